@@ -1,17 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox as tkmb
 
-from PIL import Image, ImageTk
 from openstuder import SIConnectionState, SIAccessLevel, SIStatus, SIDescriptionFlags
 
+from descriptioncache import DescriptionCache
 from installation import Xcom485IInstallation, DemoInstallation
-from uielements import DashboardPage, Button, Switch
+from messagestore import MessageStore
+from uielements import DashboardPage, Button, Switch, ResourceCache
 
 
 class ConnectionDashboardPage(DashboardPage):
+    DESCRIPTION_FLAGS = SIDescriptionFlags.INCLUDE_ACCESS_INFORMATION | SIDescriptionFlags.INCLUDE_DEVICE_INFORMATION
+
     def _setup_ui(self):
-        dashboard_image = Image.open('img/Connection.png')
-        self.__background_render = ImageTk.PhotoImage(dashboard_image)
+        self.__background_render = ResourceCache.image('img/Connection.png')
         self.__background = tk.Label(self, image=self.__background_render)
         self.__background.place(x=0, y=0, relwidth=1, relheight=1)
 
@@ -64,7 +66,14 @@ class ConnectionDashboardPage(DashboardPage):
         pass
 
     def on_connected(self, access_level, gateway_version):
-        self.client.enumerate()
+        # Reuse the description of the gateway if it was cached after the last enumeration, otherwise enumerate and describe.
+        self.__description_cache = DescriptionCache(f'{self.__host.get()}:{self.__port.get()}')
+        self.master.master.message_store = MessageStore(f'{self.__host.get()}:{self.__port.get()}')
+        description = self.__description_cache.get(flags=ConnectionDashboardPage.DESCRIPTION_FLAGS)
+        if description is not None:
+            self.__initialize(description)
+        else:
+            self.client.enumerate()
 
     def on_disconnected(self):
         self.__back_button.place(x=-100, y=-100, width=0, height=0)
@@ -77,7 +86,8 @@ class ConnectionDashboardPage(DashboardPage):
 
     def on_enumerated(self, status, device_count):
         if status == SIStatus.SUCCESS:
-            self.client.describe(flags=SIDescriptionFlags.INCLUDE_ACCESS_INFORMATION | SIDescriptionFlags.INCLUDE_DEVICE_INFORMATION)
+            self.__description_cache.invalidate()
+            self.client.describe(flags=ConnectionDashboardPage.DESCRIPTION_FLAGS)
         else:
             self.client.disconnect()
             tkmb.showerror('Enumeration error', f'Error during device enumeration: {status}')
@@ -88,6 +98,10 @@ class ConnectionDashboardPage(DashboardPage):
             tkmb.showerror('Describe error', f'Error requesting system description: {status}')
             return
 
+        if self.__initialize(description):
+            self.__description_cache.put(description, flags=ConnectionDashboardPage.DESCRIPTION_FLAGS)
+
+    def __initialize(self, description):
         if 'instances' not in description:
             self.client.disconnect()
             tkmb.showerror('Initialize error', 'Error requesting system description: data missing')
@@ -136,6 +150,7 @@ class ConnectionDashboardPage(DashboardPage):
         self.__port_entry.config(state=tk.DISABLED)
         self.__username_entry.config(state=tk.DISABLED)
         self.__password_entry.config(state=tk.DISABLED)
+        return True
 
     def __connect_or_disconnect(self, _):
         if self.__button.state():
@@ -0,0 +1,76 @@
+import json
+import os
+
+
+class DescriptionCache:
+    def __init__(self, gateway, directory=os.path.join(os.path.expanduser('~'), '.openstuder', 'descriptions')):
+        self.__path = os.path.join(directory, gateway.replace(':', '_').replace('/', '_') + '.json')
+        self.__generation = 0
+        self.__descriptions = {}
+        self.__indexes = {}
+
+        # Load persisted descriptions, a missing or broken file just means an empty cache.
+        try:
+            with open(self.__path) as file:
+                data = json.load(file)
+            self.__generation = data['generation']
+            self.__descriptions = data['descriptions']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        for key, description in self.__descriptions.items():
+            flags, id_ = key.split('/', 1)
+            if id_ == '':
+                self.__indexes[flags] = DescriptionCache.__index(description)
+
+    def generation(self):
+        return self.__generation
+
+    def get(self, id_=None, flags=None):
+        # Exact match first, if not present look the ID up in the index of the complete description requested with the same flags.
+        description = self.__descriptions.get(DescriptionCache.__key(id_, flags))
+        if description is None and id_ is not None:
+            description = self.__indexes.get(DescriptionCache.__flags_key(flags), {}).get(id_)
+        return description
+
+    def put(self, description, id_=None, flags=None):
+        self.__descriptions[DescriptionCache.__key(id_, flags)] = description
+        if id_ is None:
+            self.__indexes[DescriptionCache.__flags_key(flags)] = DescriptionCache.__index(description)
+        self.__save()
+
+    def invalidate(self):
+        # Called after an enumeration, as the devices and properties might have changed.
+        self.__generation += 1
+        self.__descriptions = {}
+        self.__indexes = {}
+        self.__save()
+
+    def __save(self):
+        os.makedirs(os.path.dirname(self.__path), exist_ok=True)
+        temporary_path = self.__path + '.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump({'generation': self.__generation, 'descriptions': self.__descriptions}, file)
+        os.replace(temporary_path, self.__path)
+
+    @staticmethod
+    def __flags_key(flags):
+        return 'default' if flags is None else str(flags.value)
+
+    @staticmethod
+    def __key(id_, flags):
+        return f'{DescriptionCache.__flags_key(flags)}/{id_ or ""}'
+
+    @staticmethod
+    def __index(description):
+        # Map every device access, device and property ID to its part of the description.
+        index = {}
+        for device_access in description.get('instances', []):
+            access_id = device_access.get('id')
+            index[access_id] = device_access
+            for device in device_access.get('devices', []):
+                device_id = f'{access_id}.{device.get("id")}'
+                index[device_id] = device
+                for property_ in device.get('properties', []):
+                    index[f'{device_id}.{property_.get("id")}'] = property_
+        return index
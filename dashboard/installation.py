@@ -24,13 +24,29 @@ class Installation:
         self.solar_charger_count = solar_charger_count
         self.battery_count = battery_count
         self.property_values = {}
+        self.__aggregate_index = {}
+        self.__aggregate_sums = {}
 
     def get_property_ids(self, categories):
         return []
 
     def set_property_value(self, property_id, value):
+        previous_value = self.property_values.get(property_id)
         self.property_values[property_id] = value
 
+        # Keep the running sum of the aggregate the property belongs to (if any) up to date, so getters are O(1).
+        aggregate = self.__aggregate_index.get(property_id)
+        if aggregate is not None:
+            self.__aggregate_sums[aggregate] += (value or 0) - (previous_value or 0)
+
+    def _index_aggregate(self, aggregate, property_ids):
+        self.__aggregate_sums.setdefault(aggregate, 0)
+        for property_id in property_ids:
+            self.__aggregate_index[property_id] = aggregate
+
+    def _get_aggregate(self, aggregate):
+        return self.__aggregate_sums.get(aggregate, 0)
+
     def inverter_get_state(self):
         return False
 
@@ -96,61 +112,52 @@ class Installation:
 
 
 class Xcom485IInstallation(Installation):
+    # Properties that are summed up over all devices of a type, as (category, aggregate, device type, property). Both the property ids read for a
+    # category and the aggregate index are derived from this table.
+    AGGREGATED_PROPERTIES = (
+        (PropertyCategory.PV_POWER, 'pv_power', 'vt', 11004),
+        (PropertyCategory.PV_POWER, 'pv_power', 'vs', 15010),
+        (PropertyCategory.PV_ENERGY_STATS, 'pv_energy_today', 'vt', 11007),
+        (PropertyCategory.PV_ENERGY_STATS, 'pv_energy_yesterday', 'vt', 11011),
+        (PropertyCategory.PV_ENERGY_STATS, 'pv_energy_today', 'vs', 15017),
+        (PropertyCategory.PV_ENERGY_STATS, 'pv_energy_yesterday', 'vs', 15027),
+        (PropertyCategory.GRID_POWER, 'grid_power', 'xt', 3137),
+        (PropertyCategory.GRID_ENERGY_STATS, 'grid_energy_today', 'xt', 3081),
+        (PropertyCategory.GRID_ENERGY_STATS, 'grid_energy_yesterday', 'xt', 3080),
+        (PropertyCategory.OUTPUT_POWER, 'output_power', 'xt', 3136),
+        (PropertyCategory.OUTPUT_ENERGY_STATS, 'output_energy_today', 'xt', 3083),
+        (PropertyCategory.OUTPUT_ENERGY_STATS, 'output_energy_yesterday', 'xt', 3082)
+    )
+
     def __init__(self, device_access_id, devices):
-        self.__xtender_ids = []
-        self.__variotrack_ids = []
-        self.__variostring_ids = []
+        self.__device_ids = {'xt': [], 'vt': [], 'vs': []}
         self.__battery_id = None
 
         for device in devices:
             id_ = device['id']
-            if id_.startswith('xt') and id_ != 'xts':
-                self.__xtender_ids.append(id_)
-            if id_.startswith('vt') and id_ != 'vts':
-                self.__variotrack_ids.append(id_)
-            if id_.startswith('vs') and id_ != 'vss':
-                self.__variostring_ids.append(id_)
+            if id_[:2] in self.__device_ids and id_ not in ('xts', 'vts', 'vss'):
+                self.__device_ids[id_[:2]].append(id_)
             if id_ == 'bat':
                 self.__battery_id = id_
-            super(Xcom485IInstallation, self).__init__(device_access_id, len(self.__xtender_ids), len(self.__variotrack_ids) + len(self.__variostring_ids),
-                                                       1 if self.__battery_id is not None else 0)
+        super(Xcom485IInstallation, self).__init__(device_access_id, len(self.__device_ids['xt']), len(self.__device_ids['vt']) + len(self.__device_ids['vs']),
+                                                   1 if self.__battery_id is not None else 0)
+
+        # Index every property that has to be summed up over multiple devices by the aggregate it contributes to.
+        for aggregate, property_id in self.__aggregated_properties(~PropertyCategory(0)):
+            self._index_aggregate(aggregate, [property_id])
+
+    def __aggregated_properties(self, categories):
+        for category, aggregate, device_type, property_id in Xcom485IInstallation.AGGREGATED_PROPERTIES:
+            if categories & category:
+                for device_id in self.__device_ids[device_type]:
+                    yield aggregate, f'{self.device_access_id}.{device_id}.{property_id}'
 
     def get_property_ids(self, categories):
         ids = []
         if categories & PropertyCategory.INVERTER_STATE:
             ids += [f'{self.device_access_id}.xts.3049']
 
-        if categories & PropertyCategory.PV_POWER:
-            for vt_id in self.__variotrack_ids:
-                ids.append(f'{self.device_access_id}.{vt_id}.11004')
-            for vs_id in self.__variostring_ids:
-                ids.append(f'{self.device_access_id}.{vs_id}.15010')
-
-        if categories & PropertyCategory.PV_ENERGY_STATS:
-            for vt_id in self.__variotrack_ids:
-                ids.append(f'{self.device_access_id}.{vt_id}.11007')
-                ids.append(f'{self.device_access_id}.{vt_id}.11011')
-            for vs_id in self.__variostring_ids:
-                ids.append(f'{self.device_access_id}.{vs_id}.15017')
-                ids.append(f'{self.device_access_id}.{vs_id}.15027')
-
-        if categories & PropertyCategory.GRID_POWER:
-            for xt_id in self.__xtender_ids:
-                ids.append(f'{self.device_access_id}.{xt_id}.3137')
-
-        if categories & PropertyCategory.GRID_ENERGY_STATS:
-            for xt_id in self.__xtender_ids:
-                ids.append(f'{self.device_access_id}.{xt_id}.3081')
-                ids.append(f'{self.device_access_id}.{xt_id}.3080')
-
-        if categories & PropertyCategory.OUTPUT_POWER:
-            for xt_id in self.__xtender_ids:
-                ids.append(f'{self.device_access_id}.{xt_id}.3136')
-
-        if categories & PropertyCategory.OUTPUT_ENERGY_STATS:
-            for xt_id in self.__xtender_ids:
-                ids.append(f'{self.device_access_id}.{xt_id}.3083')
-                ids.append(f'{self.device_access_id}.{xt_id}.3082')
+        ids += [property_id for _, property_id in self.__aggregated_properties(categories)]
 
         if categories & PropertyCategory.BATTERY_POWER:
             ids += [f'{self.device_access_id}.bat.7003']
@@ -181,67 +188,31 @@ class Xcom485IInstallation(Installation):
         client.write_property(f'{self.device_access_id}.xts.1399')
 
     def pv_get_power(self):
-        power = 0
-        for key, value in self.property_values.items():
-            if key.endswith('.11004') or key.endswith('.15010'):
-                power += value
-        return power
+        return self._get_aggregate('pv_power')
 
     def pv_get_energy_today(self):
-        energy = 0
-        for key, value in self.property_values.items():
-            if key.endswith('.11007') or key.endswith('.15017'):
-                energy += value
-        return energy
+        return self._get_aggregate('pv_energy_today')
 
     def pv_get_energy_yesterday(self):
-        energy = 0
-        for key, value in self.property_values.items():
-            if key.endswith('.11011') or key.endswith('.15027'):
-                energy += value
-        return energy
+        return self._get_aggregate('pv_energy_yesterday')
 
     def grid_get_power(self):
-        power = 0
-        for key, value in self.property_values.items():
-            if key.endswith('.3137'):
-                power += value
-        return power
+        return self._get_aggregate('grid_power')
 
     def grid_get_energy_today(self):
-        energy = 0
-        for key, value in self.property_values.items():
-            if key.endswith('.3081'):
-                energy += value
-        return energy
+        return self._get_aggregate('grid_energy_today')
 
     def grid_get_energy_yesterday(self):
-        energy = 0
-        for key, value in self.property_values.items():
-            if key.endswith('.3080'):
-                energy += value
-        return energy
+        return self._get_aggregate('grid_energy_yesterday')
 
     def output_get_power(self):
-        power = 0
-        for key, value in self.property_values.items():
-            if key.endswith('.3136'):
-                power += value
-        return power
+        return self._get_aggregate('output_power')
 
     def output_get_energy_today(self):
-        energy = 0
-        for key, value in self.property_values.items():
-            if key.endswith('.3083'):
-                energy += value
-        return energy
+        return self._get_aggregate('output_energy_today')
 
     def output_get_energy_yesterday(self):
-        energy = 0
-        for key, value in self.property_values.items():
-            if key.endswith('.3082'):
-                energy += value
-        return energy
+        return self._get_aggregate('output_energy_yesterday')
 
     def battery_get_power(self):
         return self.property_values[f'{self.device_access_id}.bat.7003']
@@ -1,21 +1,25 @@
 import tkinter as tk
-from openstuder import SIAsyncGatewayClientCallbacks, SIAsyncGatewayClient
+from openstuder import SIAsyncGatewayClientCallbacks
 
 from battery import BatteryDashboardPage
+from clientmetrics import ClientMetrics, InstrumentedAsyncGatewayClient
 from connection import ConnectionDashboardPage
 from energy import EnergyDashboardPage
 from messages import MessagesDashboardPage
 from overview import OverviewDashboardPage
+from uielements import ResourceCache, PerformanceOverlay
 
 
 class MainWindow(tk.Tk, SIAsyncGatewayClientCallbacks):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.client = SIAsyncGatewayClient()
+        # Request latencies are exported if OPENSTUDER_METRICS is set, see clientmetrics.py.
+        self.client = InstrumentedAsyncGatewayClient(ClientMetrics.from_environment('dashboard'))
         self.client.set_callbacks(self)
 
         self.installation = None
+        self.message_store = None
 
         self.title("Dashboard")
         self.geometry("1024x640")
@@ -26,6 +30,9 @@ class MainWindow(tk.Tk, SIAsyncGatewayClientCallbacks):
         container.grid_rowconfigure(0, weight=1)
         container.grid_columnconfigure(0, weight=1)
 
+        # Created after the container so it is shown above all pages.
+        self.performance_overlay = PerformanceOverlay(self)
+
         self.active_frame = None
         self.frames = {
             'overview': OverviewDashboardPage(container, self.client),
@@ -34,6 +41,7 @@ class MainWindow(tk.Tk, SIAsyncGatewayClientCallbacks):
             'messages': MessagesDashboardPage(container, self.client),
             'connection': ConnectionDashboardPage(container, self.client)
         }
+        self.__print_startup_times()
         self.change_to_frame('connection')
 
     def change_to_frame(self, name):
@@ -51,34 +59,50 @@ class MainWindow(tk.Tk, SIAsyncGatewayClientCallbacks):
                 print(exception)
             frame.tkraise()
 
+    def __print_startup_times(self):
+        font_count, image_count = ResourceCache.statistics()
+        print(f'pages built in {sum(frame.setup_time for frame in self.frames.values()):.3f}s (' +
+              ', '.join(f'{name} {frame.setup_time:.3f}s' for name, frame in self.frames.items()) +
+              f'), {font_count} fonts and {image_count} images loaded.')
+
     def on_connected(self, access_level, gateway_version):
+        self.performance_overlay.count_callback('on_connected')
         self.active_frame.on_connected(access_level, gateway_version)
 
     def on_disconnected(self):
+        self.performance_overlay.count_callback('on_disconnected')
         self.active_frame.on_disconnected()
 
     def on_enumerated(self, status, device_count):
+        self.performance_overlay.count_callback('on_enumerated')
         self.active_frame.on_enumerated(status, device_count)
 
     def on_description(self, status, id_, description):
+        self.performance_overlay.count_callback('on_description')
         self.active_frame.on_description(status, id_, description)
 
     def on_property_read(self, status, property_id, value):
+        self.performance_overlay.count_callback('on_property_read')
         self.active_frame.on_property_read(status, property_id, value)
 
     def on_properties_read(self, results):
+        self.performance_overlay.count_callback('on_properties_read')
         self.active_frame.on_properties_read(results)
 
     def on_property_updated(self, property_id, value):
+        self.performance_overlay.count_callback('on_property_updated')
         self.active_frame.on_property_updated(property_id, value)
 
     def on_device_message(self, message):
+        self.performance_overlay.count_callback('on_device_message')
         self.active_frame.on_device_message(message)
 
     def on_messages_read(self, status, count, messages):
+        self.performance_overlay.count_callback('on_messages_read')
         self.active_frame.on_messages_read(status, count, messages)
 
     def on_error(self, error):
+        self.performance_overlay.count_callback('on_error')
         self.active_frame.on_error(error)
 
 
@@ -1,15 +1,20 @@
 import tkinter as tk
+from collections import deque
 
-from PIL import Image, ImageTk
+from openstuder import SIStatus
 
-from uielements import DashboardPage, Button
+from uielements import DashboardPage, Button, ResourceCache
 import tzlocal
 
 
 class MessagesDashboardPage(DashboardPage):
+    MAX_MESSAGES = 5000
+    ROW_HEIGHT = 20
+    LIST_WIDTH = 980
+    LIST_HEIGHT = 396
+
     def _setup_ui(self):
-        dashboard_image = Image.open('img/Messages.png')
-        self.__background_render = ImageTk.PhotoImage(dashboard_image)
+        self.__background_render = ResourceCache.image('img/Messages.png')
         self.__background = tk.Label(self, image=self.__background_render)
         self.__background.place(x=0, y=0, relwidth=1, relheight=1)
 
@@ -17,28 +22,101 @@ class MessagesDashboardPage(DashboardPage):
         self.__back_button.place(x=24, y=24, width=46, height=46)
 
         self.__message_list = tk.Canvas(self, bg='#DDEBF0', bd=0, borderwidth=0, highlightthickness=0, insertborderwidth=0, selectborderwidth=0)
-        self.__message_list.place(x=22, y=160, width=980, height=396)
+        self.__message_list.place(x=22, y=160, width=MessagesDashboardPage.LIST_WIDTH, height=MessagesDashboardPage.LIST_HEIGHT)
+        self.__message_list.bind('<MouseWheel>', lambda event: self.__scroll(-1 if event.delta > 0 else 1))
+        self.__message_list.bind('<Button-4>', lambda _: self.__scroll(-1))
+        self.__message_list.bind('<Button-5>', lambda _: self.__scroll(1))
+        self.__message_list.bind('<ButtonPress-1>', self.__on_drag_start)
+        self.__message_list.bind('<B1-Motion>', self.__on_drag)
+
+        # The canvas items of the visible rows are created once and reused, scrolling moves them and only rewrites the rows whose message changed.
+        self.__messages = deque(maxlen=MessagesDashboardPage.MAX_MESSAGES)
+        self.__first = 0
+        self.__rows = deque(self.__create_row(i) for i in range(-(-MessagesDashboardPage.LIST_HEIGHT // MessagesDashboardPage.ROW_HEIGHT)))
+        self.__drag_y = 0
 
     def _activate(self, system_info):
-        self.client.read_messages(limit=20)
+        # Show the locally stored messages right away and only request the messages received since the newest one stored. An empty store is seeded
+        # with the latest messages only, not with the whole history of the gateway.
+        self.__store = self.master.master.message_store
+        self.__set_messages(self.__store.query(limit=MessagesDashboardPage.MAX_MESSAGES))
+        cursor = self.__store.cursor()
+        if cursor is None:
+            self.client.read_messages(limit=20)
+        else:
+            self.client.read_messages(from_=cursor)
 
     def _deactivate(self):
         pass
 
     def on_messages_read(self, status, count, messages):
-        self.__messages = messages
-        self.__update_message_canvas()
+        if status == SIStatus.SUCCESS and self.__store.add(messages) > 0:
+            self.__set_messages(self.__store.query(limit=MessagesDashboardPage.MAX_MESSAGES))
 
     def on_device_message(self, message):
+        self.__store.add([message])
+
+        # Follow new messages if the list is scrolled to the end, otherwise keep the visible messages in place.
+        following = self.__first == self.__last_first()
+        if len(self.__messages) == self.__messages.maxlen and self.__first > 0:
+            self.__first -= 1
         self.__messages.append(message)
-        if len(self.__messages) > 20:
-            self.__messages.pop(0)
-        self.__update_message_canvas()
-
-    def __update_message_canvas(self):
-        self.__message_list.delete('all')
-        for i, message in enumerate(self.__messages):
-            self.__message_list.create_line(20, i * 20, 950, i * 20, width=1, fill="#549CB5")
-            self.__message_list.create_text(30, 10 + i * 20, anchor=tk.W, text=f'{message.access_id}.{message.device_id}', font=self._default_font(size=13))
-            self.__message_list.create_text(166, 10 + i * 20, anchor=tk.W, text=f'{message.message} ({message.message_id})', font=self._default_font(size=13, weight='normal'))
-            self.__message_list.create_text(815, 10 + i * 20, anchor=tk.W, text=f'{message.timestamp.astimezone(tzlocal.get_localzone()).replace(tzinfo=None)}', font=self._default_font(size=13, weight='normal'))
+        self.__show(self.__last_first() if following else self.__first)
+
+    def __set_messages(self, messages):
+        self.__messages.clear()
+        self.__messages.extend(messages)
+        self.__show(self.__last_first())
+
+    def __last_first(self):
+        return max(0, len(self.__messages) - MessagesDashboardPage.LIST_HEIGHT // MessagesDashboardPage.ROW_HEIGHT)
+
+    def __scroll(self, rows):
+        self.__show(min(max(self.__first + rows, 0), self.__last_first()))
+
+    def __on_drag_start(self, event):
+        self.__drag_y = event.y
+
+    def __on_drag(self, event):
+        rows = int((self.__drag_y - event.y) / MessagesDashboardPage.ROW_HEIGHT)
+        if rows != 0:
+            self.__drag_y -= rows * MessagesDashboardPage.ROW_HEIGHT
+            self.__scroll(rows)
+
+    def __create_row(self, i):
+        tag = f'row{i}'
+        y = i * MessagesDashboardPage.ROW_HEIGHT
+        self.__message_list.create_line(20, y, 950, y, width=1, fill="#549CB5", state=tk.HIDDEN, tags=tag)
+        source = self.__message_list.create_text(30, 10 + y, anchor=tk.W, font=self._default_font(size=13), state=tk.HIDDEN, tags=tag)
+        message = self.__message_list.create_text(166, 10 + y, anchor=tk.W, font=self._default_font(size=13, weight='normal'), state=tk.HIDDEN, tags=tag)
+        timestamp = self.__message_list.create_text(815, 10 + y, anchor=tk.W, font=self._default_font(size=13, weight='normal'), state=tk.HIDDEN, tags=tag)
+        return [tag, source, message, timestamp, None]
+
+    def __show(self, first):
+        # Shift the rows that stay visible and move the rows scrolled out to the other end of the list, they are rewritten below.
+        row_count = len(self.__rows)
+        shift = first - self.__first
+        self.__first = first
+        if 0 < abs(shift) < row_count:
+            self.__message_list.move('all', 0, -shift * MessagesDashboardPage.ROW_HEIGHT)
+            self.__rows.rotate(-shift)
+            recycled = range(row_count - shift, row_count) if shift > 0 else range(0, -shift)
+            for i in recycled:
+                self.__message_list.move(self.__rows[i][0], 0, (row_count if shift > 0 else -row_count) * MessagesDashboardPage.ROW_HEIGHT)
+
+        for i, row in enumerate(self.__rows):
+            index = first + i
+            message = self.__messages[index] if index < len(self.__messages) else None
+            if row[4] is not message:
+                self.__update_row(row, message)
+
+    def __update_row(self, row, message):
+        tag, source, text, timestamp, _ = row
+        row[4] = message
+        if message is None:
+            self.__message_list.itemconfigure(tag, state=tk.HIDDEN)
+            return
+        self.__message_list.itemconfigure(tag, state=tk.NORMAL)
+        self.__message_list.itemconfigure(source, text=f'{message.access_id}.{message.device_id}')
+        self.__message_list.itemconfigure(text, text=f'{message.message} ({message.message_id})')
+        self.__message_list.itemconfigure(timestamp, text=f'{message.timestamp.astimezone(tzlocal.get_localzone()).replace(tzinfo=None)}')
@@ -0,0 +1,49 @@
+import datetime
+import os
+import sqlite3
+
+from openstuder import SIDeviceMessage
+
+
+class MessageStore:
+    def __init__(self, gateway, directory=os.path.join(os.path.expanduser('~'), '.openstuder', 'messages')):
+        self.__path = os.path.join(directory, gateway.replace(':', '_').replace('/', '_') + '.sqlite')
+
+        # Messages are unique by their timestamp, source and ID, so messages received twice are only stored once.
+        os.makedirs(directory, exist_ok=True)
+        with self.__connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS messages (timestamp REAL, access_id TEXT, device_id TEXT, message_id, message TEXT, '
+                               'PRIMARY KEY (timestamp, access_id, device_id, message_id))')
+
+    def cursor(self):
+        # Timestamp of the newest message stored, only messages from this time on have to be requested from the gateway.
+        with self.__connect() as connection:
+            timestamp, = connection.execute('SELECT MAX(timestamp) FROM messages').fetchone()
+        return None if timestamp is None else datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+
+    def add(self, messages):
+        # Returns the number of messages that were not yet stored.
+        with self.__connect() as connection:
+            count = connection.total_changes
+            connection.executemany('INSERT OR IGNORE INTO messages VALUES (?, ?, ?, ?, ?)',
+                                   [(message.timestamp.timestamp(), message.access_id, message.device_id, message.message_id, message.message)
+                                    for message in messages])
+            return connection.total_changes - count
+
+    def query(self, from_=None, to=None, limit=None):
+        # Returns the stored messages in chronological order, if a limit is given the newest ones.
+        conditions, parameters = [], []
+        if from_ is not None:
+            conditions.append('timestamp >= ?')
+            parameters.append(from_.timestamp())
+        if to is not None:
+            conditions.append('timestamp <= ?')
+            parameters.append(to.timestamp())
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self.__connect() as connection:
+            rows = connection.execute(f'SELECT * FROM messages {where} ORDER BY timestamp DESC LIMIT ?', parameters + [-1 if limit is None else limit]).fetchall()
+        return [SIDeviceMessage(access_id, device_id, message_id, message, datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc))
+                for timestamp, access_id, device_id, message_id, message in reversed(rows)]
+
+    def __connect(self):
+        return sqlite3.connect(self.__path, timeout=30)
@@ -1,16 +1,14 @@
 import tkinter as tk
 
-from PIL import Image, ImageTk
 from openstuder import SIConnectionState, SIAccessLevel, SIStatus
 
 from installation import PropertyCategory
-from uielements import DashboardPage, Switch, Button
+from uielements import DashboardPage, Switch, Button, ResourceCache
 
 
 class OverviewDashboardPage(DashboardPage):
     def _setup_ui(self):
-        dashboard_image = Image.open('img/Dashboard.png')
-        self.__background_render = ImageTk.PhotoImage(dashboard_image)
+        self.__background_render = ResourceCache.image('img/Dashboard.png')
         self.__background = tk.Label(self, image=self.__background_render)
         self.__background.place(x=0, y=0, relwidth=1, relheight=1)
 
@@ -56,6 +54,7 @@ class OverviewDashboardPage(DashboardPage):
 
         self.__battery_level_indicator = tk.Canvas(self, bg='#DDEBF0', bd=0, borderwidth=0, highlightthickness=0, insertborderwidth=0, selectborderwidth=0)
         self.__battery_level_indicator.place(x=501, y=549, width=16, height=40)
+        self.__battery_indicator_bars = -1
         self.__update_battery_indicator(0)
 
         self.__xtender_count = tk.StringVar()
@@ -108,13 +107,13 @@ class OverviewDashboardPage(DashboardPage):
 
     def on_property_updated(self, property_id, value):
         self.__installation.set_property_value(property_id, value)
-        self.__update_values()
+        self._schedule_update()
 
     def on_properties_read(self, results):
         for result in results:
             if result.status == SIStatus.SUCCESS:
                 self.__installation.set_property_value(result.id, result.value)
-        self.__update_values()
+        self._schedule_update()
 
     def on_device_message(self, message):
         count = self.__new_messages_count.get()
@@ -122,19 +121,23 @@ class OverviewDashboardPage(DashboardPage):
             count += 1
             self.__new_messages_count.set(count)
 
-    def __update_values(self):
+    def _update_values(self):
         self.__on_off_button.set_state(self.__installation.inverter_get_state())
 
-        self.__pv_charge_power.set(DashboardPage.format_float_value(self.__installation.pv_get_power(), max_decimals=3))
-        self.__ac_charge_power.set(DashboardPage.format_float_value(self.__installation.grid_get_power(), max_decimals=3))
-        self.__consumed_power.set(DashboardPage.format_float_value(self.__installation.output_get_power(), max_decimals=3))
-        self.__battery_charge_power.set(DashboardPage.format_float_value(self.__installation.battery_get_power(), max_decimals=3))
+        self._set_text(self.__pv_charge_power, DashboardPage.format_float_value(self.__installation.pv_get_power(), max_decimals=3))
+        self._set_text(self.__ac_charge_power, DashboardPage.format_float_value(self.__installation.grid_get_power(), max_decimals=3))
+        self._set_text(self.__consumed_power, DashboardPage.format_float_value(self.__installation.output_get_power(), max_decimals=3))
+        self._set_text(self.__battery_charge_power, DashboardPage.format_float_value(self.__installation.battery_get_power(), max_decimals=3))
 
         battery_charge = self.__installation.battery_get_charge()
-        self.__battery_level.set(DashboardPage.format_float_value(battery_charge, max_digits=3, max_decimals=0))
+        self._set_text(self.__battery_level, DashboardPage.format_float_value(battery_charge, max_digits=3, max_decimals=0))
         self.__update_battery_indicator(battery_charge)
 
     def __update_battery_indicator(self, level):
+        bars = int(level / 10)
+        if self.__battery_indicator_bars == bars:
+            return
+        self.__battery_indicator_bars = bars
         self.__battery_level_indicator.delete('all')
         for i in range(10):
             if (100 - i * 10) <= level:
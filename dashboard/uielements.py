@@ -1,5 +1,8 @@
 import datetime
+import os
 import sys
+import threading
+import time
 import tkinter as tk
 from tkinter import font as tkft
 from tkinter import messagebox as tkmb
@@ -8,10 +11,48 @@ from PIL import ImageTk, Image
 from openstuder import SIAsyncGatewayClientCallbacks, SIStatus
 
 
+class ResourceCache:
+    # Fonts and images are shared by all pages and widgets, they are created on first use and never released.
+    __fonts = {}
+    __images = {}
+    __font_family = None
+
+    @staticmethod
+    def font(size, weight):
+        key = (ResourceCache.font_family(), size, weight)
+        font = ResourceCache.__fonts.get(key)
+        if font is None:
+            font = ResourceCache.__fonts[key] = tkft.Font(family=key[0], size=size, weight=weight)
+        return font
+
+    @staticmethod
+    def font_family():
+        if ResourceCache.__font_family is None:
+            available_fonts = tkft.families()
+            if 'Arial' in available_fonts:
+                ResourceCache.__font_family = 'Arial'
+            elif 'Liberation Sans' in available_fonts:
+                ResourceCache.__font_family = 'Liberation Sans'
+            else:
+                ResourceCache.__font_family = 'Sans'
+        return ResourceCache.__font_family
+
+    @staticmethod
+    def image(path):
+        image = ResourceCache.__images.get(path)
+        if image is None:
+            image = ResourceCache.__images[path] = ImageTk.PhotoImage(Image.open(path))
+        return image
+
+    @staticmethod
+    def statistics():
+        return len(ResourceCache.__fonts), len(ResourceCache.__images)
+
+
 class Button(tk.Label):
     def __init__(self, parent, image, callback=None):
         self.__callback = callback
-        self.__image_render = ImageTk.PhotoImage(Image.open(image))
+        self.__image_render = ResourceCache.image(image)
         super(Button, self).__init__(parent, image=self.__image_render)
         self.bind('<Button-1>', self.__on_click)
 
@@ -27,8 +68,8 @@ class Switch(tk.Label):
         self.__callback = callback
 
         # Load images.
-        self.__image_on_render = ImageTk.PhotoImage(Image.open(image_on))
-        self.__image_off_render = ImageTk.PhotoImage(Image.open(image_off))
+        self.__image_on_render = ResourceCache.image(image_on)
+        self.__image_off_render = ResourceCache.image(image_off)
 
         # Call superclass constructor.
         super(Switch, self).__init__(parent, image=(self.__image_on_render if initial_state else self.__image_off_render))
@@ -40,6 +81,8 @@ class Switch(tk.Label):
         return self.__state
 
     def set_state(self, state):
+        if state == self.__state:
+            return
         self.__state = state
         self.config(image=(self.__image_on_render if self.__state else self.__image_off_render))
 
@@ -48,17 +91,94 @@ class Switch(tk.Label):
             self.__callback(self)
 
 
+class PerformanceOverlay(tk.Label):
+    # Debug overlay showing the callback rates, the time spent updating the pages, the event loop lag and the pending updates. Toggled with F12 or
+    # shown at startup if OPENSTUDER_HUD is set, nothing is measured while hidden.
+    REFRESH_INTERVAL = 1000
+    LAG_PROBE_INTERVAL = 100
+
+    def __init__(self, master):
+        super(PerformanceOverlay, self).__init__(master, font='TkFixedFont', justify=tk.LEFT, anchor=tk.NW, bg='black', fg='#7CFC00', padx=6, pady=4)
+        self.visible = False
+        self.__generation = 0
+
+        # Callbacks are counted from the client thread, the counters are read from the UI thread.
+        self.__lock = threading.Lock()
+        self.__callbacks = {}
+        self.__updates = {}
+        self.__lags = []
+        self.__refreshed_at = time.perf_counter()
+
+        if os.environ.get('OPENSTUDER_HUD'):
+            self.after_idle(self.toggle)
+
+    def toggle(self):
+        # The generation stops the timers of an earlier time the overlay was shown.
+        self.visible = not self.visible
+        self.__generation += 1
+        if self.visible:
+            self.__take_counters()
+            self.configure(text='measuring...')
+            self.place(relx=1, x=-8, y=8, anchor=tk.NE)
+            self.lift()
+            self.after(PerformanceOverlay.LAG_PROBE_INTERVAL, self.__probe_lag, self.__generation,
+                       time.perf_counter() + PerformanceOverlay.LAG_PROBE_INTERVAL / 1000)
+            self.after(PerformanceOverlay.REFRESH_INTERVAL, self.__refresh, self.__generation)
+        else:
+            self.place_forget()
+
+    def count_callback(self, name):
+        if self.visible:
+            with self.__lock:
+                self.__callbacks[name] = self.__callbacks.get(name, 0) + 1
+
+    def record_update(self, page, duration, pending):
+        if self.visible:
+            with self.__lock:
+                count, total, maximum, coalesced = self.__updates.get(page, (0, 0., 0., 0))
+                self.__updates[page] = count + 1, total + duration, max(maximum, duration), coalesced + pending
+
+    def __take_counters(self):
+        # Returns the time elapsed and the counters since the last call and starts counting from zero.
+        with self.__lock:
+            now = time.perf_counter()
+            counters = now - self.__refreshed_at, self.__callbacks, self.__updates, self.__lags
+            self.__callbacks, self.__updates, self.__lags, self.__refreshed_at = {}, {}, [], now
+        return counters
+
+    def __probe_lag(self, generation, expected_at):
+        # The event loop lag is how much later than requested an after() callback runs.
+        if generation != self.__generation:
+            return
+        now = time.perf_counter()
+        with self.__lock:
+            self.__lags.append(max(0., now - expected_at))
+        self.after(PerformanceOverlay.LAG_PROBE_INTERVAL, self.__probe_lag, generation, now + PerformanceOverlay.LAG_PROBE_INTERVAL / 1000)
+
+    def __refresh(self, generation):
+        if generation != self.__generation:
+            return
+        elapsed, callbacks, updates, lags = self.__take_counters()
+
+        lines = ['event loop lag: ' + (f'{sum(lags) / len(lags) * 1000:.1f} ms avg, {max(lags) * 1000:.1f} ms max' if lags else '-'), 'callbacks/s:']
+        lines += [f'  {name:<22}{count / elapsed:>7.1f}' for name, count in sorted(callbacks.items())] or ['  -']
+        lines.append('update values:')
+        lines += [f'  {page:<12}{count / elapsed:>4.1f}/s {total / count * 1000:>6.1f} ms avg {maximum * 1000:>6.1f} ms max {coalesced / count:>5.1f} coalesced'
+                  for page, (count, total, maximum, coalesced) in sorted(updates.items())] or ['  -']
+        lines.append('pending updates: ' + ', '.join(f'{frame.page_name()} {frame.pending_updates()}' for frame in self.master.frames.values()))
+        self.configure(text='\n'.join(lines))
+        self.after(PerformanceOverlay.REFRESH_INTERVAL, self.__refresh, generation)
+
+
 class DashboardPage(tk.Frame, SIAsyncGatewayClientCallbacks):
-    def __init__(self, parent, client):
+    def __init__(self, parent, client, update_interval=250):
+        started_at = time.perf_counter()
         super(DashboardPage, self).__init__(parent)
 
-        available_fonts = tkft.families()
-        if 'Arial' in available_fonts:
-            self.__default_font = 'Arial'
-        elif 'Liberation Sans' in available_fonts:
-            self.__default_font = 'Liberation Sans'
-        else:
-            self.__default_font = 'Sans'
+        # Updates are coalesced and flushed at most once per update interval (in milliseconds).
+        self.__update_interval = update_interval
+        self.__update_job = None
+        self.__pending_updates = 0
 
         if sys.platform == 'darwin':
             self.__size_factor = 1
@@ -67,6 +187,7 @@ class DashboardPage(tk.Frame, SIAsyncGatewayClientCallbacks):
 
         self.__main = parent.master
         self.client = client
+        self.bind_all('<F12>', lambda _: self._toggle_performance_overlay())
         self._setup_ui()
         self.grid(row=0, column=0, sticky="nsew")
 
@@ -75,8 +196,11 @@ class DashboardPage(tk.Frame, SIAsyncGatewayClientCallbacks):
         self.__time_label = tk.Label(self, textvariable=self.__time, font=self._default_font(weight='normal'), bg='white', fg='black', anchor=tk.W)
         self.__time_label.place(x=25, y=588, width=400, height=20)
 
+        # Time needed to build the page, reported at startup.
+        self.setup_time = time.perf_counter() - started_at
+
     def _default_font(self, size=16, weight='bold'):
-        return tkft.Font(family=self.__default_font, size=int(size*self.__size_factor), weight=weight)
+        return ResourceCache.font(int(size*self.__size_factor), weight)
 
     def _setup_ui(self):
         raise NotImplementedError()
@@ -90,6 +214,36 @@ class DashboardPage(tk.Frame, SIAsyncGatewayClientCallbacks):
     def _change_to_frame(self, frame_name):
         self.__main.change_to_frame(frame_name)
 
+    def _update_values(self):
+        pass
+
+    def _schedule_update(self):
+        self.__pending_updates += 1
+        if self.__update_job is None:
+            self.__update_job = self.after(self.__update_interval, self.__flush_update)
+
+    def __flush_update(self):
+        self.__update_job = None
+        pending, self.__pending_updates = self.__pending_updates, 0
+        started_at = time.perf_counter()
+        self._update_values()
+        self.__main.performance_overlay.record_update(self.page_name(), time.perf_counter() - started_at, pending)
+
+    def _toggle_performance_overlay(self):
+        self.__main.performance_overlay.toggle()
+
+    def page_name(self):
+        return type(self).__name__.replace('DashboardPage', '').lower()
+
+    def pending_updates(self):
+        # Number of updates received since the values were last updated on screen.
+        return self.__pending_updates
+
+    @staticmethod
+    def _set_text(variable, text):
+        if variable.get() != text:
+            variable.set(text)
+
     def on_property_read(self, status, property_id, value):
         if status == SIStatus.SUCCESS:
             self.on_property_updated(property_id, value)
@@ -0,0 +1,54 @@
+import argparse
+import datetime
+import io
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from datalog import parse_datalog_csv
+
+
+def generate_csv(rows):
+    """
+    Generates synthetic datalog CSV data in the format sent by the gateway, one entry per second.
+
+    :param rows: Number of entries.
+    :return: CSV data as string.
+    """
+
+    start = datetime.datetime(2021, 1, 1)
+    return ''.join(f'{(start + datetime.timedelta(seconds=i)).isoformat()},{np.sin(i / 3600) * 1000:.3f}\n' for i in range(rows))
+
+
+def parse_with_pandas(csv):
+    """
+    Reference implementation: The way the datalog GUI used to parse the data.
+    """
+
+    data = pd.read_csv(io.StringIO(csv), sep=',', header=None)
+    data[0] = pd.to_datetime(data[0])
+    return data
+
+
+if __name__ == '__main__':
+    # Parse arguments passed.
+    parser = argparse.ArgumentParser(description='Compares the datalog CSV parser against pandas read_csv + to_datetime')
+    parser.add_argument('--rows', type=int, default=1000000, help='number of datalog entries to parse.')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs, the best one is reported.')
+    args = parser.parse_args()
+
+    csv = generate_csv(args.rows)
+
+    # Ensure both implementations return the same data.
+    times, values = parse_datalog_csv(csv)
+    reference = parse_with_pandas(csv)
+    assert np.array_equal(times, reference[0].values.astype('datetime64[s]'))
+    assert np.array_equal(values, reference[1].values)
+
+    pandas_time = min(timeit.repeat(lambda: parse_with_pandas(csv), number=1, repeat=args.repeat))
+    numpy_time = min(timeit.repeat(lambda: parse_datalog_csv(csv), number=1, repeat=args.repeat))
+
+    print(f'{args.rows} rows, best of {args.repeat} runs:')
+    print(f'  pandas read_csv + to_datetime: {pandas_time:.3f}s')
+    print(f'  parse_datalog_csv:             {numpy_time:.3f}s ({pandas_time / numpy_time:.1f}x)')
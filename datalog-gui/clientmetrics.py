@@ -0,0 +1,303 @@
+import atexit
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from enum import Enum
+
+from openstuder import SIGatewayClient, SIAsyncGatewayClient, SIStatus, SIProtocolError
+
+
+class ClientMetrics:
+    # Upper bounds of the latency histogram buckets in seconds, the last bucket collects everything slower.
+    BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1., 2., 5., 10., 20., 50.)
+
+    def __init__(self, name):
+        self.__name = name
+        self.__started = time.time()
+        self.__lock = threading.Lock()
+        self.__operations = {}
+        self.__pending = {}
+        self.__export_thread = None
+
+    @staticmethod
+    def from_environment(name):
+        # Exports the metrics periodically if OPENSTUDER_METRICS is set to a file path or to an http(s) URL the metrics are posted to.
+        metrics = ClientMetrics(name)
+        destination = os.environ.get('OPENSTUDER_METRICS')
+        if destination:
+            metrics.start_export(destination, float(os.environ.get('OPENSTUDER_METRICS_INTERVAL', 60)))
+        return metrics
+
+    def record(self, operation, duration, payload_size=0, error=False):
+        with self.__lock:
+            statistics = self.__operations.get(operation)
+            if statistics is None:
+                statistics = self.__operations[operation] = {'count': 0, 'errors': 0, 'total': 0., 'min': None, 'max': 0., 'bytes': 0,
+                                                             'histogram': [0] * (len(ClientMetrics.BUCKETS) + 1)}
+            statistics['count'] += 1
+            statistics['errors'] += 1 if error else 0
+            statistics['total'] += duration
+            statistics['min'] = duration if statistics['min'] is None else min(statistics['min'], duration)
+            statistics['max'] = max(statistics['max'], duration)
+            statistics['bytes'] += payload_size
+            statistics['histogram'][ClientMetrics.__bucket(duration)] += 1
+
+    def start(self, operation):
+        # Asynchronous requests are not identified, the gateway answers requests of the same kind in order, so the oldest pending one is the one answered.
+        with self.__lock:
+            self.__pending.setdefault(operation, deque()).append(time.perf_counter())
+
+    def finish(self, operation, payload_size=0, error=False):
+        with self.__lock:
+            pending = self.__pending.get(operation)
+            if not pending:
+                return
+            started = pending.popleft()
+        self.record(operation, time.perf_counter() - started, payload_size, error)
+
+    def fail_pending(self):
+        # Called when the connection is lost or fails, no answers will be received for the requests still pending.
+        with self.__lock:
+            pending, self.__pending = self.__pending, {}
+        now = time.perf_counter()
+        for operation, started in pending.items():
+            for started_at in started:
+                self.record(operation, now - started_at, error=True)
+
+    def snapshot(self):
+        with self.__lock:
+            operations = {operation: dict(statistics, histogram=list(statistics['histogram'])) for operation, statistics in self.__operations.items()}
+        for statistics in operations.values():
+            statistics['mean'] = statistics['total'] / statistics['count']
+            for percentile in (50, 90, 99):
+                statistics[f'p{percentile}'] = ClientMetrics.__percentile(statistics, percentile)
+        return {'name': self.__name, 'started': self.__started, 'timestamp': time.time(), 'buckets': list(ClientMetrics.BUCKETS), 'operations': operations}
+
+    def summary(self):
+        # One line per operation, the operations taking the most time in total first.
+        lines = [f'{"operation":<26}{"count":>7}{"errors":>7}{"total":>10}{"mean":>9}{"p90":>9}{"max":>9}{"bytes":>12}']
+        for operation, statistics in sorted(self.snapshot()['operations'].items(), key=lambda item: -item[1]['total']):
+            lines.append(f'{operation:<26}{statistics["count"]:>7}{statistics["errors"]:>7}{statistics["total"]:>9.3f}s{statistics["mean"] * 1000:>7.1f}ms'
+                         f'{statistics["p90"] * 1000:>7.1f}ms{statistics["max"] * 1000:>7.1f}ms{statistics["bytes"]:>12}')
+        return '\n'.join(lines)
+
+    def export(self, destination):
+        data = json.dumps(self.snapshot(), indent=2)
+        if destination.startswith(('http://', 'https://')):
+            request = urllib.request.Request(destination, data=data.encode(), headers={'Content-Type': 'application/json'}, method='POST')
+            with urllib.request.urlopen(request, timeout=10):
+                pass
+        else:
+            directory = os.path.dirname(os.path.abspath(destination))
+            os.makedirs(directory, exist_ok=True)
+            temporary_path = destination + '.tmp'
+            with open(temporary_path, 'w') as file:
+                file.write(data)
+            os.replace(temporary_path, destination)
+
+    def start_export(self, destination, interval=60.):
+        # Exports from a background thread every interval seconds and a last time when the application exits.
+        if self.__export_thread is not None:
+            return
+
+        def export_loop():
+            while True:
+                time.sleep(interval)
+                self.__try_export(destination)
+
+        self.__export_thread = threading.Thread(target=export_loop, daemon=True)
+        self.__export_thread.start()
+        atexit.register(self.__try_export, destination)
+
+    def __try_export(self, destination):
+        try:
+            self.export(destination)
+        except Exception as exception:
+            print(f'could not export client metrics to {destination}: {exception}')
+
+    @staticmethod
+    def __bucket(duration):
+        for index, bound in enumerate(ClientMetrics.BUCKETS):
+            if duration <= bound:
+                return index
+        return len(ClientMetrics.BUCKETS)
+
+    @staticmethod
+    def __percentile(statistics, percentile):
+        # Upper bound of the bucket the percentile falls into, limited by the slowest request measured.
+        rank = statistics['count'] * percentile / 100
+        seen = 0
+        for index, count in enumerate(statistics['histogram']):
+            seen += count
+            if seen >= rank and count > 0:
+                return min(ClientMetrics.BUCKETS[index], statistics['max']) if index < len(ClientMetrics.BUCKETS) else statistics['max']
+        return statistics['max']
+
+
+def payload_size(value):
+    # Estimated size of the data received, nothing is serialized or copied: Strings and bytes like the CSV data of read_datalog_csv are measured
+    # directly, structured results by the size of their parts. Long lists like the messages of read_messages are extrapolated from their first items.
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, Enum):
+        return len(value.name)
+    if isinstance(value, dict):
+        return sum(payload_size(key) + payload_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        sample = value[:100]
+        return sum(payload_size(item) for item in sample) * len(value) // len(sample) if len(sample) > 0 else 0
+    if hasattr(value, '__dict__'):
+        return payload_size(vars(value))
+    return len(str(value))
+
+
+def _failed(status):
+    return isinstance(status, SIStatus) and status not in (SIStatus.SUCCESS, SIStatus.IN_PROGRESS)
+
+
+class InstrumentedGatewayClient(SIGatewayClient):
+    # Synchronous client recording the latency, the size of the received data and the errors of every request.
+    def __init__(self, metrics):
+        super().__init__()
+        self.metrics = metrics
+
+    def connect(self, *args, **kwargs):
+        return self.__measure('connect', super().connect, *args, **kwargs)
+
+    def enumerate(self, *args, **kwargs):
+        return self.__measure('enumerate', super().enumerate, *args, **kwargs)
+
+    def describe(self, *args, **kwargs):
+        return self.__measure('describe', super().describe, *args, **kwargs)
+
+    def find_properties(self, *args, **kwargs):
+        return self.__measure('find_properties', super().find_properties, *args, **kwargs)
+
+    def read_property(self, *args, **kwargs):
+        return self.__measure('read_property', super().read_property, *args, **kwargs)
+
+    def read_properties(self, *args, **kwargs):
+        return self.__measure('read_properties', super().read_properties, *args, **kwargs)
+
+    def write_property(self, *args, **kwargs):
+        return self.__measure('write_property', super().write_property, *args, **kwargs)
+
+    def read_datalog_properties(self, *args, **kwargs):
+        return self.__measure('read_datalog_properties', super().read_datalog_properties, *args, **kwargs)
+
+    def read_datalog_csv(self, *args, **kwargs):
+        return self.__measure('read_datalog_csv', super().read_datalog_csv, *args, **kwargs)
+
+    def read_messages(self, *args, **kwargs):
+        return self.__measure('read_messages', super().read_messages, *args, **kwargs)
+
+    def __measure(self, operation, function, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except (SIProtocolError, OSError):
+            self.metrics.record(operation, time.perf_counter() - started, error=True)
+            raise
+        status = result[0] if isinstance(result, tuple) else None
+        self.metrics.record(operation, time.perf_counter() - started, payload_size(result[1:] if status is not None else result), _failed(status))
+        return result
+
+
+class InstrumentedAsyncGatewayClient(SIAsyncGatewayClient):
+    # Asynchronous client measuring the time from each request until the callback answering it is called.
+    CALLBACKS = {
+        'connect': 'on_connected',
+        'enumerate': 'on_enumerated',
+        'describe': 'on_description',
+        'find_properties': 'on_properties_found',
+        'read_property': 'on_property_read',
+        'read_properties': 'on_properties_read',
+        'write_property': 'on_property_written',
+        'subscribe_to_property': 'on_property_subscribed',
+        'subscribe_to_properties': 'on_properties_subscribed',
+        'unsubscribe_from_property': 'on_property_unsubscribed',
+        'unsubscribe_from_properties': 'on_properties_unsubscribed',
+        'read_datalog_properties': 'on_datalog_properties_read',
+        'read_datalog': 'on_datalog_read_csv',
+        'read_messages': 'on_messages_read'
+    }
+
+    def __init__(self, metrics):
+        super().__init__()
+        self.metrics = metrics
+
+    def set_callbacks(self, callbacks):
+        super().set_callbacks(callbacks)
+        for operation, callback in InstrumentedAsyncGatewayClient.CALLBACKS.items():
+            setattr(self, callback, self.__measured(operation, getattr(self, callback)))
+        on_disconnected, on_error = self.on_disconnected, self.on_error
+        self.on_disconnected = lambda: (self.metrics.fail_pending(), on_disconnected())
+        self.on_error = lambda error: (self.metrics.fail_pending(), on_error(error))
+
+    def connect(self, *args, **kwargs):
+        self.metrics.start('connect')
+        return super().connect(*args, **kwargs)
+
+    def enumerate(self, *args, **kwargs):
+        self.metrics.start('enumerate')
+        return super().enumerate(*args, **kwargs)
+
+    def describe(self, *args, **kwargs):
+        self.metrics.start('describe')
+        return super().describe(*args, **kwargs)
+
+    def find_properties(self, *args, **kwargs):
+        self.metrics.start('find_properties')
+        return super().find_properties(*args, **kwargs)
+
+    def read_property(self, *args, **kwargs):
+        self.metrics.start('read_property')
+        return super().read_property(*args, **kwargs)
+
+    def read_properties(self, *args, **kwargs):
+        self.metrics.start('read_properties')
+        return super().read_properties(*args, **kwargs)
+
+    def write_property(self, *args, **kwargs):
+        self.metrics.start('write_property')
+        return super().write_property(*args, **kwargs)
+
+    def subscribe_to_property(self, *args, **kwargs):
+        self.metrics.start('subscribe_to_property')
+        return super().subscribe_to_property(*args, **kwargs)
+
+    def subscribe_to_properties(self, *args, **kwargs):
+        self.metrics.start('subscribe_to_properties')
+        return super().subscribe_to_properties(*args, **kwargs)
+
+    def unsubscribe_from_property(self, *args, **kwargs):
+        self.metrics.start('unsubscribe_from_property')
+        return super().unsubscribe_from_property(*args, **kwargs)
+
+    def unsubscribe_from_properties(self, *args, **kwargs):
+        self.metrics.start('unsubscribe_from_properties')
+        return super().unsubscribe_from_properties(*args, **kwargs)
+
+    def read_datalog_properties(self, *args, **kwargs):
+        self.metrics.start('read_datalog_properties')
+        return super().read_datalog_properties(*args, **kwargs)
+
+    def read_datalog(self, *args, **kwargs):
+        self.metrics.start('read_datalog')
+        return super().read_datalog(*args, **kwargs)
+
+    def read_messages(self, *args, **kwargs):
+        self.metrics.start('read_messages')
+        return super().read_messages(*args, **kwargs)
+
+    def __measured(self, operation, callback):
+        def measured(*args):
+            status = args[0] if args and isinstance(args[0], SIStatus) else None
+            self.metrics.finish(operation, payload_size(args[1:] if status is not None else args), _failed(status))
+            return callback(*args)
+        return measured
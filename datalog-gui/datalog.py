@@ -0,0 +1,92 @@
+import numpy as np
+
+
+def parse_datalog_csv(csv):
+    """
+    Parses datalog CSV data as returned by the gateway into NumPy arrays.
+
+    The gateway always uses the same timestamp format (ISO 8601 extended, YYYY-MM-DDTHH:MM:SS), so there is no need for
+    format inference: Timestamps are cut to their fixed width and converted to datetime64 in a single vectorized step,
+    values are converted to float64 the same way.
+
+    :param csv: CSV data, one "timestamp,value" entry per line.
+    :return: Tuple of two arrays of the same length: timestamps (datetime64[s]) and values (float64).
+    """
+
+    # Split all fields at once, timestamps and values are then alternating.
+    csv = csv.strip()
+    fields = csv.replace('\n', ',').split(',') if csv else []
+    count = len(fields) // 2
+
+    # Convert into preallocated arrays.
+    times = np.empty(count, dtype='datetime64[s]')
+    values = np.empty(count, dtype=np.float64)
+    times[:] = np.array(fields[0:2 * count:2], dtype='U19')
+    values[:] = fields[1:2 * count:2]
+    return times, values
+
+
+def decimate_min_max(times, values, start=None, end=None, buckets=1000):
+    """
+    Reduces the data to render in the time range [start, end] to at most two points per bucket, the minimum and the
+    maximum value of the bucket. Peaks are preserved, so the rendered line looks the same as with the full data as long
+    as there are no more buckets than horizontal pixels.
+
+    :param times: Sorted timestamps (datetime64).
+    :param values: Values (float64), same length as times.
+    :param start: Optional start of the visible time range (datetime64), defaults to the first timestamp.
+    :param end: Optional end of the visible time range (datetime64), defaults to the last timestamp.
+    :param buckets: Number of buckets, usually the width of the plot in pixels.
+    :return: Tuple of decimated timestamps and values.
+    """
+
+    # Select the visible range including one point on each side, so the line continues to the border of the plot.
+    first = max(np.searchsorted(times, start, 'left') - 1, 0) if start is not None else 0
+    last = min(np.searchsorted(times, end, 'right') + 1, len(times)) if end is not None else len(times)
+    times = times[first:last]
+    values = values[first:last]
+
+    # Nothing to do if there are not more points than the decimated result would contain.
+    count = len(values)
+    if count <= 2 * buckets:
+        return times, values
+
+    # Split the data into buckets of equal size, the last one is padded by repeating the last value.
+    size = -(-count // buckets)
+    padded = np.empty(buckets * size, dtype=values.dtype)
+    padded[:count] = values
+    padded[count:] = values[-1]
+    padded = padded.reshape(buckets, size)
+
+    # Take the index of the minimum and the maximum of each bucket in chronological order.
+    offsets = np.arange(buckets) * size
+    indexes = np.sort(np.stack((padded.argmin(axis=1) + offsets, padded.argmax(axis=1) + offsets), axis=1), axis=1).ravel()
+    indexes = np.unique(np.minimum(indexes, count - 1))
+    return times[indexes], values[indexes]
+
+
+def parse_decimated_datalog_csv(chunks, start, end, buckets):
+    """
+    Parses datalog CSV data chunk by chunk and min/max decimates every chunk right after it was parsed, so only the
+    decimated data is kept and the memory needed does not grow with the amount of data logged in the time range. Every
+    chunk gets the share of the buckets that corresponds to the part of the time range it covers.
+
+    :param chunks: Iterable over the CSV data chunks in chronological order, one "timestamp,value" entry per line.
+    :param start: Start of the time range (datetime64).
+    :param end: End of the time range (datetime64).
+    :param buckets: Number of buckets for the whole time range, this is the resolution kept for zooming into the data.
+    :return: Tuple of two arrays of the same length: decimated timestamps (datetime64[s]) and values (float64).
+    """
+
+    duration = max((end - start) / np.timedelta64(1, 's'), 1.)
+    decimated_times, decimated_values = [], []
+    for csv in chunks:
+        times, values = parse_datalog_csv(csv)
+        if len(times) > 0:
+            chunk_buckets = max(int(np.ceil(buckets * ((times[-1] - times[0]) / np.timedelta64(1, 's')) / duration)), 1)
+            times, values = decimate_min_max(times, values, buckets=chunk_buckets)
+            decimated_times.append(times)
+            decimated_values.append(values)
+    if len(decimated_times) == 0:
+        return np.empty(0, dtype='datetime64[s]'), np.empty(0, dtype=np.float64)
+    return np.concatenate(decimated_times), np.concatenate(decimated_values)
@@ -1,4 +1,9 @@
-import io
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.simpledialog as tksd
@@ -7,9 +12,12 @@ import tkinter.filedialog as tkfd
 import center_tk_window as tkct
 import openstuder
 import matplotlib
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import pandas as pd
+import numpy as np
+from datalog import parse_decimated_datalog_csv, decimate_min_max
+from clientmetrics import ClientMetrics, InstrumentedGatewayClient
 from PIL import Image, ImageTk
 import tkcalendar as tkcal
 import datetime
@@ -149,21 +157,24 @@ class ProgressDialog(tk.Toplevel):
     Simple progress dialog featuring a customizable text and the progress bar.
     """
 
-    def __init__(self, master, text, total_steps):
+    def __init__(self, master, text, total_steps, on_cancel=None):
         """
         Constructs and shows the progress bar.
 
         :param master: Parent window.
         :param text: Text to show on top of the progress bar.
         :param total_steps: Total number of steps.
+        :param on_cancel: Optional callable, if present a cancel button is shown which calls it when clicked.
         """
 
         super(ProgressDialog, self).__init__(master)
         self._master = master
+        self._on_cancel = on_cancel
 
         # Center the dialog on the parent window.
-        self.minsize(300, 100)
-        self.maxsize(300, 100)
+        height = 100 if on_cancel is None else 140
+        self.minsize(300, height)
+        self.maxsize(300, height)
         tkct.center_on_parent(master, self)
 
         # Place label and set text.
@@ -174,6 +185,12 @@ class ProgressDialog(tk.Toplevel):
         self._progress = ttk.Progressbar(self, maximum=total_steps)
         self._progress.pack(side=tk.TOP, fill=tk.X, expand=True, pady=(0, 10), padx=10)
 
+        # Place cancel button if the operation can be cancelled.
+        if on_cancel is not None:
+            self._cancel_button = tk.Button(self, text='Cancel', command=self.cancel)
+            self._cancel_button.pack(side=tk.TOP, pady=(0, 10))
+            self.protocol('WM_DELETE_WINDOW', self.cancel)
+
         # Block parent window.
         self.grab_set()
 
@@ -193,6 +210,17 @@ class ProgressDialog(tk.Toplevel):
         # Ensure pending events are processed.
         self._master.update()
 
+    def cancel(self):
+        """
+        Disables the cancel button and requests the cancellation of the running operation.
+
+        :return: None
+        """
+
+        self._cancel_button.config(state=tk.DISABLED)
+        self._label.config(text='Cancelling...')
+        self._on_cancel()
+
     def finish(self):
         """
         Closes the dialog and returns controls to the parent window.
@@ -207,12 +235,254 @@ class ProgressDialog(tk.Toplevel):
         self.destroy()
 
 
+def read_datalog_csv_chunks(client, property_id, from_, to, chunk_duration=datetime.timedelta(days=1), cancelled=None):
+    """
+    Reads the logged data of a property in consecutive time windows, so that only the data of a single window has to be
+    held in memory at once.
+
+    :param client: Connected synchronous gateway client.
+    :param property_id: ID of the property to read.
+    :param from_: Start of the time range.
+    :param to: End of the time range.
+    :param chunk_duration: Duration of a single time window.
+    :param cancelled: Optional callable returning true if the download should be aborted.
+    :return: Generator yielding the CSV data of each non-empty time window in chronological order.
+    :raises RuntimeError: If the gateway reports an error status.
+    """
+
+    chunk_from = from_
+    while chunk_from <= to:
+        if callable(cancelled) and cancelled():
+            return
+
+        # The gateway has a resolution of one second and includes both ends of the window.
+        chunk_to = min(chunk_from + chunk_duration - datetime.timedelta(seconds=1), to)
+        status, _, count, csv = client.read_datalog_csv(property_id, from_=chunk_from, to=chunk_to)
+        if status != openstuder.SIStatus.SUCCESS:
+            raise RuntimeError(status.name)
+        if count > 0:
+            yield csv
+        chunk_from += chunk_duration
+
+
+class DatalogCache:
+    """
+    Persistent local cache of logged property data, stored in an SQLite database.
+
+    The cache works with whole days: For every property it records which days have been completely downloaded from the
+    gateway and only requests the missing days. Days that are not over yet are never considered complete and are always
+    requested again.
+    """
+
+    def __init__(self, path, gateway):
+        """
+        Opens (and creates if needed) the cache database.
+
+        :param path: Path to the SQLite database file.
+        :param gateway: Key identifying the gateway, usually host and port.
+        """
+
+        self._path = path
+        self._gateway = gateway
+
+        # Create database and tables if they do not exist yet.
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS days (gateway TEXT, property_id TEXT, day TEXT, PRIMARY KEY (gateway, property_id, day))')
+            connection.execute('CREATE TABLE IF NOT EXISTS samples (gateway TEXT, property_id TEXT, day TEXT, time TEXT, value TEXT)')
+            connection.execute('CREATE INDEX IF NOT EXISTS samples_by_day ON samples (gateway, property_id, day)')
+
+    def read_datalog_csv_chunks(self, client, property_id, from_, to, cancelled=None):
+        """
+        Reads the logged data of a property day by day, either from the cache or from the gateway if the day is not
+        cached yet. Data read from the gateway is added to the cache.
+
+        :param client: Callable returning a connected synchronous gateway client, only called if data is missing.
+        :param property_id: ID of the property to read.
+        :param from_: Start of the time range, extended to the start of the day.
+        :param to: End of the time range, extended to the end of the day.
+        :param cancelled: Optional callable returning true if the download should be aborted.
+        :return: Generator yielding the CSV data of each non-empty day in chronological order.
+        :raises RuntimeError: If the gateway reports an error status.
+        """
+
+        today = datetime.date.today()
+        day = from_.date()
+        while day <= to.date():
+            if callable(cancelled) and cancelled():
+                return
+
+            if not self._is_complete(property_id, day):
+                # Day is missing in the cache, download it from the gateway and store it.
+                day_from = datetime.datetime.combine(day, datetime.datetime.min.time())
+                day_to = datetime.datetime.combine(day, datetime.datetime.max.time())
+                csv = '\n'.join(read_datalog_csv_chunks(client(), property_id, day_from, day_to))
+                self._store(property_id, day, csv, complete=day < today)
+
+            # Serve the day from the cache.
+            csv = self._load(property_id, day)
+            if csv:
+                yield csv
+            day += datetime.timedelta(days=1)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # Using the connection as context manager only commits or rolls back the transaction, it has to be closed explicitly.
+        connection = sqlite3.connect(self._path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _is_complete(self, property_id, day):
+        with self._connect() as connection:
+            return connection.execute('SELECT 1 FROM days WHERE gateway=? AND property_id=? AND day=?',
+                                      (self._gateway, property_id, day.isoformat())).fetchone() is not None
+
+    def _store(self, property_id, day, csv, complete):
+        samples = [(self._gateway, property_id, day.isoformat()) + tuple(line.split(',', 1)) for line in csv.splitlines() if ',' in line]
+        with self._connect() as connection:
+            connection.execute('DELETE FROM samples WHERE gateway=? AND property_id=? AND day=?', (self._gateway, property_id, day.isoformat()))
+            connection.executemany('INSERT INTO samples VALUES (?, ?, ?, ?, ?)', samples)
+            if complete:
+                connection.execute('INSERT OR REPLACE INTO days VALUES (?, ?, ?)', (self._gateway, property_id, day.isoformat()))
+
+    def _load(self, property_id, day):
+        with self._connect() as connection:
+            rows = connection.execute('SELECT time, value FROM samples WHERE gateway=? AND property_id=? AND day=? ORDER BY rowid',
+                                      (self._gateway, property_id, day.isoformat())).fetchall()
+        return ''.join(f'{time},{value}\n' for time, value in rows)
+
+
+class DatalogDownloader:
+    """
+    Downloads the logged data of multiple properties concurrently using a pool of gateway connections. Results are
+    reported through a thread-safe queue which has to be polled from the UI thread.
+    """
+
+    def __init__(self, host, port, username, password, max_connections=4, cache=None, metrics=None):
+        """
+        Constructs the downloader, connections to the gateway are only established once they are needed.
+
+        :param host: Hostname or IP address of the gateway.
+        :param port: TCP port of the gateway.
+        :param username: Username or None.
+        :param password: Password or None.
+        :param max_connections: Maximal number of concurrent connections to the gateway.
+        :param cache: Optional datalog cache, if present only data missing in the cache is requested from the gateway.
+        :param metrics: Optional client metrics the requests of all connections are recorded to.
+        """
+
+        self._cache = cache
+        self._metrics = metrics if metrics is not None else ClientMetrics('datalog-downloader')
+        self._host = host
+        self._port = port
+        self._username = username
+        self._password = password
+        self._executor = ThreadPoolExecutor(max_workers=max_connections)
+        self._futures = []
+        self._local = threading.local()
+        self._clients = []
+        self._clients_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self.results = queue.Queue()
+
+    def start(self, property_ids, from_, to, handler):
+        """
+        Starts downloading the data of all given properties.
+
+        For each property a tuple (property_id, result, error) is put into the results queue. The result is the value
+        returned by the handler or None if the download failed, in that case error contains the error message.
+
+        :param property_ids: List of property IDs to download.
+        :param from_: Start of the time window.
+        :param to: End of the time window.
+        :param handler: Callable receiving the property ID and an iterable over the CSV data chunks, called from a
+               worker thread.
+        :return: None
+        """
+
+        for property_id in property_ids:
+            self._futures.append(self._executor.submit(self._download, property_id, from_, to, handler))
+
+    def cancel(self):
+        """
+        Cancels all downloads that have not been started yet, running downloads are completed but their results are
+        dropped.
+
+        :return: None
+        """
+
+        self._cancelled.set()
+        for future in self._futures:
+            future.cancel()
+
+    def cancelled(self):
+        """
+        Returns true if the downloads have been cancelled.
+
+        :return: True if cancelled, False otherwise.
+        """
+
+        return self._cancelled.is_set()
+
+    def close(self):
+        """
+        Waits in the background for running downloads to complete and closes all connections to the gateway.
+
+        :return: None
+        """
+
+        threading.Thread(target=self._close, daemon=True).start()
+
+    def _close(self):
+        self._executor.shutdown(wait=True)
+        for client in self._clients:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+
+    def _client(self):
+        # Each worker thread uses its own connection as the synchronous client is not thread-safe.
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = InstrumentedGatewayClient(self._metrics)
+            client.connect(self._host, self._port, self._username, self._password)
+            with self._clients_lock:
+                self._clients.append(client)
+            self._local.client = client
+        return client
+
+    def _download(self, property_id, from_, to, handler):
+        if self._cancelled.is_set():
+            return
+        try:
+            if self._cache is not None:
+                chunks = self._cache.read_datalog_csv_chunks(self._client, property_id, from_, to, cancelled=self._cancelled.is_set)
+            else:
+                chunks = read_datalog_csv_chunks(self._client(), property_id, from_, to, cancelled=self._cancelled.is_set)
+            result = handler(property_id, chunks)
+            if not self._cancelled.is_set():
+                self.results.put((property_id, result, None))
+        except openstuder.SIProtocolError as error:
+            self.results.put((property_id, None, error.reason()))
+        except Exception as error:
+            self.results.put((property_id, None, str(error)))
+
+
 class MainWindow(tk.Tk):
+    # Points kept per pixel of the plot width, the received data is decimated to this resolution to bound the memory used.
+    ZOOM_DETAIL = 16
+
     def __init__(self):
         super(MainWindow, self).__init__()
 
-        # Create OpenStuder client instance.
-        self._client = openstuder.SIGatewayClient()
+        # Create OpenStuder client instance, request latencies are exported if OPENSTUDER_METRICS is set.
+        self._metrics = ClientMetrics.from_environment('datalog-gui')
+        self._client = InstrumentedGatewayClient(self._metrics)
+        self._connection_parameters = None
 
         # Setup UI.
         self.title('OpenStuder Datalog GUI Demo')
@@ -273,6 +543,7 @@ class MainWindow(tk.Tk):
         # Add plot output widget including navigator controls.
         self.figure = plt.Figure()
         self.axes = self.figure.add_subplot(111)
+        self._plotted = {}
         self.canvas = FigureCanvasTkAgg(self.figure, master=self._container)
         self.canvas.get_tk_widget().pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True)
         self.toolbar = NavigationToolbar2Tk(self.canvas, self._container)
@@ -310,6 +581,9 @@ class MainWindow(tk.Tk):
                 self._client.disconnect()
                 return
 
+            # Remember connection parameters, the downloader opens additional connections with them.
+            self._connection_parameters = (dialog.host(), dialog.port(), dialog.username(), dialog.password())
+
             # Enable/disable UI elements for connected state.
             self._gatewayMenu.entryconfig('Disconnect', state=tk.NORMAL)
             self._gatewayMenu.entryconfig('Connect...', state=tk.DISABLED)
@@ -347,64 +621,52 @@ class MainWindow(tk.Tk):
 
         # Clear and redraw plot.
         self.axes.cla()
+        self._plotted.clear()
         self.canvas.draw()
 
     def on_plot_button_clicked(self):
         # Get list of selected properties.
-        selection = self.property_list.curselection()
-
-        # Show download progress dialog.
-        progress = ProgressDialog(self, 'Downloading plot data...', len(selection))
+        property_ids = [self.property_list.get(selected) for selected in self.property_list.curselection()]
 
-        # Clear current plots.
+        # Clear current plots, clearing the axes also removes its callbacks.
         self.axes.cla()
-
-        # Iterate over the list of selected properties and download and plot one by one.
-        for selected in selection:
-
-            # Get current property ID.
-            property_id = self.property_list.get(selected)
-
-            # Try to get the property data.
-            try:
-                status, _, count, csv = self._client.read_datalog_csv(property_id,
-                                                                      from_=datetime.datetime.combine(self._from_date_picker.get_date(), datetime.datetime.min.time()),
-                                                                      to=datetime.datetime.combine(self._to_date_picker.get_date(), datetime.datetime.max.time()))
-
-                # Check that the status is ok, otherwise fail.
-                if status != openstuder.SIStatus.SUCCESS:
-                    tkmb.showerror(message=f'Error retrieving data for property {property_id}: {status.name}')
-                    continue
-
-                # Convert received CSV data to pandas table.
-                data = pd.read_csv(io.StringIO(csv), sep=',', header=None)
-
-                # Convert date string in column 0 to Python Datetime.
-                data[0] = pd.to_datetime(data[0])
-
-                # Rename columns from pure indexes to user-friendly names.
-                data.rename(columns={0: 'time', 1: property_id}, inplace=True)
-
-                # Plot the data.
-                data.plot(ax=self.axes, x=0, y=1)
-
-                # Update progress bar.
-                progress.step()
-
-            except openstuder.SIProtocolError as error:
-                tkmb.showerror(message=f'Error retrieving data for property {property_id}: {error.reason()}')
-                continue
-
-        # Finally update the plot on the UI.
-        self.canvas.draw()
-
-        # Close progress dialog.
-        progress.finish()
+        self._plotted.clear()
+        self.axes.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+        # Decimate the data already while it is received, the kept resolution allows to zoom in ZOOM_DETAIL times before detail is lost.
+        from_, to = self._selected_time_range()
+        start, end = np.datetime64(from_, 's'), np.datetime64(to, 's')
+        buckets = self._plot_width() * MainWindow.ZOOM_DETAIL
+
+        def parse(property_id, chunks):
+            # Convert received CSV data chunk by chunk to decimated arrays, this is done in the worker thread.
+            times, values = parse_decimated_datalog_csv(chunks, start, end, buckets)
+
+            # Nothing to plot if there is no data in the time range.
+            if len(times) == 0:
+                return None
+            return times, values
+
+        def plot(property_id, data):
+            # Plot the data decimated to the plot width and keep the received data for zooming, matplotlib has to be used from the UI thread.
+            if data is not None:
+                times, values = data
+                line, = self.axes.plot(*decimate_min_max(times, values, buckets=self._plot_width()), label=property_id)
+                self._plotted[property_id] = (line, times, values)
+
+        def finished():
+            # Show legend and update the plot on the UI.
+            if self._plotted:
+                self.axes.legend()
+            self.canvas.draw()
+
+        # Download all properties in the background and plot them as they arrive.
+        self._download(property_ids, 'Downloading plot data...', parse, plot, finished)
 
     def on_download_button_clicked(self):
 
         # Get list of selected properties.
-        selection = self.property_list.curselection()
+        property_ids = [self.property_list.get(selected) for selected in self.property_list.curselection()]
 
         # Ask the user to which directory the CSV files have to be saved to.
         directory = tkfd.askdirectory()
@@ -412,42 +674,78 @@ class MainWindow(tk.Tk):
         # Do nothing if the user pressed the cancel button.
         if directory:
 
-            # Show download progress dialog.
-            progress = ProgressDialog(self, 'Downloading data...', len(selection))
-
-            # Iterate over the list of selected properties and download and save one by one.
-            for selected in selection:
-                property_id = self.property_list.get(selected)
-
-                # Try to get the property data.
-                try:
-                    status, _, count, csv = self._client.read_datalog_csv(property_id,
-                                                                          from_=datetime.datetime.combine(
-                                                                              self._from_date_picker.get_date(),
-                                                                              datetime.datetime.min.time()),
-                                                                          to=datetime.datetime.combine(
-                                                                              self._to_date_picker.get_date(),
-                                                                              datetime.datetime.max.time()))
-
-                    # Check that the status is ok, otherwise fail.
-                    if status != openstuder.SIStatus.SUCCESS:
-                        tkmb.showerror(message=f'Error when retrieving data for property {property_id}')
-                        continue
-
-                    # Write CSV data into file.
-                    with open(f'{directory}/{property_id}.csv', 'w') as file:
+            def save(property_id, chunks):
+                # Write CSV data chunk by chunk into file, this is done in the worker thread.
+                with open(f'{directory}/{property_id}.csv', 'w') as file:
+                    for csv in chunks:
                         file.write(csv)
+                        if not csv.endswith('\n'):
+                            file.write('\n')
+
+            # Download and save all properties in the background.
+            self._download(property_ids, 'Downloading data...', save)
+
+    def _download(self, property_ids, text, handler, on_result=None, on_finished=None):
+        # Disable the buttons while the download is running.
+        self._plot_button.config(state=tk.DISABLED)
+        self._download_button.config(state=tk.DISABLED)
+
+        # Start the downloads in the background and show cancellable progress dialog.
+        host, port, username, password = self._connection_parameters
+        cache = DatalogCache(os.path.join(os.path.expanduser('~'), '.openstuder', 'datalog.sqlite'), f'{host}:{port}')
+        downloader = DatalogDownloader(host, port, username, password, cache=cache, metrics=self._metrics)
+        progress = ProgressDialog(self, text, len(property_ids), on_cancel=downloader.cancel)
+        from_, to = self._selected_time_range()
+        downloader.start(property_ids, from_, to, handler)
 
-                    # Update progress bar.
-                    progress.step()
+        # Poll the results from the UI thread.
+        self.after(50, self._poll_download, downloader, progress, len(property_ids), on_result, on_finished)
+
+    def _poll_download(self, downloader, progress, remaining, on_result, on_finished):
+        # Process all results received so far.
+        while remaining > 0 and not downloader.cancelled():
+            try:
+                property_id, result, error = downloader.results.get_nowait()
+            except queue.Empty:
+                break
+            remaining -= 1
+
+            if error is not None:
+                tkmb.showerror(message=f'Error retrieving data for property {property_id}: {error}')
+            elif callable(on_result):
+                on_result(property_id, result)
+
+            # Update progress bar.
+            progress.step()
+
+        # Continue polling as long as downloads are pending.
+        if remaining > 0 and not downloader.cancelled():
+            self.after(50, self._poll_download, downloader, progress, remaining, on_result, on_finished)
+            return
+
+        # Close connections, finish the operation and close the progress dialog.
+        downloader.close()
+        if callable(on_finished):
+            on_finished()
+        progress.finish()
+        if self._client.state() == openstuder.SIConnectionState.CONNECTED:
+            self._plot_button.config(state=tk.NORMAL)
+            self._download_button.config(state=tk.NORMAL)
 
-                except openstuder.SIProtocolError as error:
-                    tkmb.showerror(message=f'Error retrieving data for property {property_id}: {error.reason()}')
-                    continue
+    def _on_xlim_changed(self, axes):
+        # Decimate the received data again for the visible time range after zooming or panning.
+        start, end = (np.datetime64(mdates.num2date(limit).replace(tzinfo=None), 's') for limit in axes.get_xlim())
+        for line, times, values in self._plotted.values():
+            line.set_data(*decimate_min_max(times, values, start, end, buckets=self._plot_width()))
+        self.canvas.draw_idle()
 
-            # Close progress dialog.
-            progress.finish()
+    def _plot_width(self):
+        # Width of the plot area in pixels, rendering more than one bucket per pixel does not add any visible detail.
+        return max(int(self.axes.bbox.width), 1)
 
+    def _selected_time_range(self):
+        return (datetime.datetime.combine(self._from_date_picker.get_date(), datetime.datetime.min.time()),
+                datetime.datetime.combine(self._to_date_picker.get_date(), datetime.datetime.max.time()))
 
 if __name__ == '__main__':
     mainWindow = MainWindow()
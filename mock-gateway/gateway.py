@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import time
+
+import websockets
+
+
+def hours_today(t):
+    """
+    Hours passed since local midnight.
+
+    :param t: Unix timestamp.
+    :return: Value between 0 and 24.
+    """
+
+    local = time.localtime(t)
+    return local.tm_hour + local.tm_min / 60 + local.tm_sec / 3600
+
+
+def daylight(t):
+    """
+    Simulated irradiation, a half sine wave between 6:00 and 18:00 local time.
+
+    :param t: Unix timestamp.
+    :return: Value between 0 and 1.
+    """
+
+    return max(0.0, math.sin(math.pi * (hours_today(t) - 6) / 12))
+
+
+def energy_today(t, peak_power):
+    """
+    Energy produced since midnight by a source following the daylight curve, the integral of daylight() times the peak power.
+
+    :param t: Unix timestamp.
+    :param peak_power: Power at noon in kW.
+    :return: Energy in kWh.
+    """
+
+    hour = min(max(hours_today(t), 6), 18)
+    return round(peak_power * 12 / math.pi * (1 - math.cos(math.pi * (hour - 6) / 12)), 3)
+
+
+def ripple(t, period, amplitude, phase=0.0):
+    return amplitude * math.sin(2 * math.pi * t / period + phase)
+
+
+class SimulatedProperty:
+    """
+    Property of a simulated device, its value is a function of time unless it has been written.
+    """
+
+    def __init__(self, id_, description, type_='Float', unit='', value=None, writeable=False, logged=False):
+        self.id = id_
+        self.description = description
+        self.type = type_
+        self.unit = unit
+        self.value = value
+        self.writeable = writeable
+        self.logged = logged
+
+    def read(self, t):
+        if self.type == 'Signal':
+            return None
+        return round(self.value(t), 3) if callable(self.value) else self.value
+
+    def describe(self):
+        return {
+            'id': self.id,
+            'type': self.type,
+            'readable': self.type != 'Signal',
+            'writeable': self.writeable,
+            'description': self.description,
+            'unit': self.unit
+        }
+
+
+class SimulatedInstallation:
+    """
+    Simulated device access with the devices and properties of an Xcom-485i or the Demo driver, as expected by the dashboard examples.
+    """
+
+    def __init__(self, driver='Xcom485i', xtenders=1, variotracks=1, variostrings=0, extra_properties=0):
+        """
+        Creates the devices of the installation.
+
+        :param driver: Either "Xcom485i" or "Demo".
+        :param xtenders: Number of Xtender inverters (Xcom485i only).
+        :param variotracks: Number of VarioTrack solar chargers (Xcom485i only).
+        :param variostrings: Number of VarioString solar chargers (Xcom485i only).
+        :param extra_properties: Number of additional logged properties per device, to simulate large descriptions.
+        """
+
+        self.driver = driver
+        self.inverters_on = True
+        self.devices = {}
+
+        if driver == 'Xcom485i':
+            self.id = 'xcom'
+            pv_count = variotracks + variostrings
+            self.__add_device('xts', 'Multicast', self.__inverter_control_properties())
+            for i in range(1, xtenders + 1):
+                self.__add_device(f'xt{i}', 'XTH 8000-48', self.__inverter_properties(xtenders))
+            if variotracks > 0:
+                self.__add_device('vts', 'Multicast', [])
+            for i in range(1, variotracks + 1):
+                self.__add_device(f'vt{i}', 'VT-80', self.__solar_properties(11004, 11007, 11011, pv_count))
+            if variostrings > 0:
+                self.__add_device('vss', 'Multicast', [])
+            for i in range(1, variostrings + 1):
+                self.__add_device(f'vs{i}', 'VS-120', self.__solar_properties(15010, 15017, 15027, pv_count))
+            self.__add_device('bat', 'BSP', self.__battery_properties())
+        elif driver == 'Demo':
+            self.id = 'demo'
+            self.__add_device('inv', 'Demo inverter', self.__inverter_control_properties() + self.__inverter_properties(1))
+            self.__add_device('sol', 'Demo solar charger', self.__solar_properties(11004, 11007, 11011, 1))
+            self.__add_device('bat', 'Demo battery', self.__battery_properties())
+        else:
+            raise ValueError(f'unsupported driver "{driver}"')
+
+        for index, device in enumerate(self.devices.values()):
+            for i in range(extra_properties):
+                property_ = SimulatedProperty(90000 + i, f'Simulated value {i}', unit='V', logged=True,
+                                              value=lambda t, i=i, phase=index + i: 100 + ripple(t, 60 + i, 10, phase))
+                device['properties'][property_.id] = property_
+
+    def property(self, property_id):
+        """
+        Looks up a property by its global ID.
+
+        :param property_id: Global property ID, "<access>.<device>.<property>".
+        :return: Tuple of the status string and the property if found.
+        """
+
+        components = property_id.split('.')
+        if len(components) != 3 or components[0] != self.id:
+            return 'NoDeviceAccess', None
+        device = self.devices.get(components[1])
+        if device is None:
+            return 'NoDevice', None
+        try:
+            property_ = device['properties'].get(int(components[2]))
+        except ValueError:
+            property_ = None
+        return ('Success', property_) if property_ is not None else ('NoProperty', None)
+
+    def read(self, property_id, t):
+        status, property_ = self.property(property_id)
+        return status, property_.read(t) if property_ is not None else None
+
+    def write(self, property_id, value):
+        status, property_ = self.property(property_id)
+        if property_ is None:
+            return status
+        if not property_.writeable:
+            return 'Error'
+        if property_.type == 'Signal':
+            self.inverters_on = property_.id == 1415
+            return 'Success'
+        try:
+            property_.value = float(value)
+            return 'Success'
+        except (TypeError, ValueError):
+            return 'InvalidValue'
+
+    def describe(self, id_=None, flags=None):
+        """
+        Creates the description in the format sent by the gateway.
+
+        :param id_: Optional device access, device or property ID to describe only this part of the installation.
+        :param flags: Set of flags requested, all information is included if no flags are given.
+        :return: Tuple of the status string and the description.
+        """
+
+        def included(flag):
+            return flags is None or flag in flags
+
+        def describe_device(device_id, device):
+            description = {'id': device_id, 'model': device['model'], 'virtual': device['model'] == 'Multicast'}
+            if included('IncludePropertyInformation'):
+                description['properties'] = [property_.describe() for property_ in device['properties'].values()]
+            return description
+
+        if id_ is None or id_ == self.id:
+            access = {'id': self.id}
+            if included('IncludeDriverInformation') or included('IncludeAccessInformation'):
+                access['driver'] = self.driver
+            if included('IncludeDeviceInformation'):
+                access['devices'] = [describe_device(device_id, device) for device_id, device in self.devices.items()]
+            return 'Success', access if id_ is not None else {'instances': [access]}
+
+        components = id_.split('.')
+        if components[0] != self.id:
+            return 'NoDeviceAccess', {}
+        device = self.devices.get(components[1])
+        if device is None:
+            return 'NoDevice', {}
+        if len(components) == 2:
+            return 'Success', describe_device(components[1], device)
+        status, property_ = self.property(id_)
+        return status, property_.describe() if property_ is not None else {}
+
+    def logged_property_ids(self):
+        return [f'{self.id}.{device_id}.{property_.id}' for device_id, device in self.devices.items()
+                for property_ in device['properties'].values() if property_.logged]
+
+    def __add_device(self, id_, model, properties):
+        self.devices[id_] = {'model': model, 'properties': {property_.id: property_ for property_ in properties}}
+
+    def __inverter_control_properties(self):
+        return [
+            SimulatedProperty(3049, 'State of the inverter', 'Enum', value=lambda t: 1.0 if self.inverters_on else 0.0),
+            SimulatedProperty(1415, 'ON of the Xtenders', 'Signal', writeable=True),
+            SimulatedProperty(1399, 'OFF of the Xtenders', 'Signal', writeable=True)
+        ]
+
+    def __inverter_properties(self, count):
+        return [
+            SimulatedProperty(3000, 'Battery voltage', unit='V', logged=True, value=lambda t: 50 + 2 * daylight(t) + ripple(t, 300, 0.2)),
+            SimulatedProperty(3136, 'Output power', unit='kW', logged=True,
+                              value=lambda t: (1.5 + ripple(t, 3600, 0.5) + ripple(t, 37, 0.05)) / count if self.inverters_on else 0.0),
+            SimulatedProperty(3137, 'Input power', unit='kW', logged=True, value=lambda t: max(0.0, 0.8 - 2 * daylight(t)) / count),
+            SimulatedProperty(3080, 'Energy AC-In from the previous day', unit='kWh', value=3.2 / count),
+            SimulatedProperty(3081, 'Energy AC-In from the current day', unit='kWh', value=lambda t: 0.2 * hours_today(t) / count),
+            SimulatedProperty(3082, 'Consumer energy of the previous day', unit='kWh', value=36.4 / count),
+            SimulatedProperty(3083, 'Consumer energy of the current day', unit='kWh', value=lambda t: 1.5 * hours_today(t) / count),
+        ]
+
+    @staticmethod
+    def __solar_properties(power_id, energy_today_id, energy_yesterday_id, count):
+        return [
+            SimulatedProperty(power_id, 'Power of the PV generator', unit='kW', logged=True, value=lambda t: 4 * daylight(t) / count + abs(ripple(t, 61, 0.05))),
+            SimulatedProperty(energy_today_id, 'Production for the current day', unit='kWh', value=lambda t: energy_today(t, 4 / count)),
+            SimulatedProperty(energy_yesterday_id, 'Production for the previous day', unit='kWh', value=30.5 / count),
+        ]
+
+    @staticmethod
+    def __battery_properties():
+        return [
+            SimulatedProperty(7000, 'Battery voltage', unit='V', logged=True, value=lambda t: 50 + 2 * daylight(t) + ripple(t, 300, 0.2)),
+            SimulatedProperty(7001, 'Battery current', unit='A', logged=True, value=lambda t: 50 * daylight(t) - 30 + ripple(t, 47, 2)),
+            SimulatedProperty(7002, 'State of Charge', unit='%', logged=True, value=lambda t: 60 + 35 * daylight(t)),
+            SimulatedProperty(7003, 'Power', unit='W', logged=True, value=lambda t: 2500 * daylight(t) - 1500 + ripple(t, 47, 100)),
+            SimulatedProperty(7007, 'Ah charged today', unit='Ah', value=lambda t: energy_today(t, 50)),
+            SimulatedProperty(7008, 'Ah discharged today', unit='Ah', value=lambda t: 30 * hours_today(t)),
+            SimulatedProperty(7009, 'Ah charged yesterday', unit='Ah', value=381.0),
+            SimulatedProperty(7010, 'Ah discharged yesterday', unit='Ah', value=702.0),
+            SimulatedProperty(7033, 'Battery temperature', unit='°C', logged=True, value=lambda t: 22 + 5 * daylight(t)),
+        ]
+
+
+class MockGateway:
+    """
+    WebSocket server speaking the OpenStuder gateway protocol (version 1) for a simulated installation. Property values
+    are computed from the time, so the datalog and the device messages can be generated on demand for any time range.
+    """
+
+    MESSAGES = [
+        (0, 'Warning (000): Battery low'),
+        (20, 'Message (020): Battery too high'),
+        (24, 'Message (024): Input voltage too high'),
+        (81, 'Message (081): Earth fault'),
+        (170, 'Message (170): Info: Battery SOC reached')
+    ]
+
+    def __init__(self, installation, update_interval=1.0, datalog_days=7, datalog_interval=60, message_interval=600,
+                 latency=0.0, access_level='Installer'):
+        """
+        :param installation: Simulated installation.
+        :param update_interval: Interval in seconds at which subscribed properties are checked for changes.
+        :param datalog_days: Number of days of logged data available.
+        :param datalog_interval: Interval in seconds between two logged values.
+        :param message_interval: Interval in seconds between two device messages.
+        :param latency: Delay in seconds added before each response.
+        :param access_level: Access level granted to every client.
+        """
+
+        self.installation = installation
+        self.update_interval = update_interval
+        self.datalog_days = datalog_days
+        self.datalog_interval = datalog_interval
+        self.message_interval = message_interval
+        self.latency = latency
+        self.access_level = access_level
+        self.statistics = {}
+        self.__subscriptions = {}
+
+    async def serve(self, host, port):
+        async with websockets.serve(self.__handle, host, port, max_size=None):
+            await self.__update_loop()
+
+    async def __handle(self, websocket, _=None):
+        self.__subscriptions[websocket] = {}
+        try:
+            authorized = False
+            async for frame in websocket:
+                command, headers, body = MockGateway.__decode_frame(frame)
+                started_at = time.perf_counter()
+                if self.latency > 0:
+                    await asyncio.sleep(self.latency)
+
+                # Only the AUTHORIZE command is accepted until the client is authorized.
+                if not authorized and command != 'AUTHORIZE':
+                    response = MockGateway.__encode_frame('ERROR', {'reason': 'not authorized'})
+                else:
+                    response = self.__dispatch(websocket, command, headers, body)
+                    authorized = authorized or response.startswith('AUTHORIZED')
+                await websocket.send(response)
+
+                count, duration, bytes_ = self.statistics.get(command, (0, 0.0, 0))
+                self.statistics[command] = (count + 1, duration + time.perf_counter() - started_at, bytes_ + len(response))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            del self.__subscriptions[websocket]
+
+    def __dispatch(self, websocket, command, headers, body):
+        now = time.time()
+        if command == 'AUTHORIZE':
+            if headers.get('protocol_version') != '1':
+                return MockGateway.__encode_frame('ERROR', {'reason': 'protocol version not supported'})
+            return MockGateway.__encode_frame('AUTHORIZED', {'access_level': self.access_level if 'user' in headers else 'Basic',
+                                                             'protocol_version': '1', 'gateway_version': '0.0.0-mock'})
+
+        elif command == 'ENUMERATE':
+            return MockGateway.__encode_frame('ENUMERATED', {'status': 'Success', 'device_count': len(self.installation.devices)})
+
+        elif command == 'DESCRIBE':
+            flags = set(headers['flags'].split(',')) if 'flags' in headers else None
+            status, description = self.installation.describe(headers.get('id'), flags)
+            response_headers = {'status': status}
+            if 'id' in headers:
+                response_headers['id'] = headers['id']
+            return MockGateway.__encode_frame('DESCRIPTION', response_headers, json.dumps(description))
+
+        elif command == 'READ PROPERTY':
+            status, value = self.installation.read(headers.get('id', ''), now)
+            response_headers = {'status': status, 'id': headers.get('id', '')}
+            if value is not None:
+                response_headers['value'] = MockGateway.__format_value(value)
+            return MockGateway.__encode_frame('PROPERTY READ', response_headers)
+
+        elif command == 'READ PROPERTIES':
+            results = []
+            for property_id in json.loads(body):
+                status, value = self.installation.read(property_id, now)
+                results.append({'status': status, 'id': property_id, 'value': None if value is None else MockGateway.__format_value(value)})
+            return MockGateway.__encode_frame('PROPERTIES READ', {'status': 'Success'}, json.dumps(results))
+
+        elif command == 'WRITE PROPERTY':
+            status = self.installation.write(headers.get('id', ''), headers.get('value'))
+            return MockGateway.__encode_frame('PROPERTY WRITTEN', {'status': status, 'id': headers.get('id', '')})
+
+        elif command in ('SUBSCRIBE PROPERTY', 'UNSUBSCRIBE PROPERTY'):
+            status = self.__subscribe(websocket, headers.get('id', ''), command == 'SUBSCRIBE PROPERTY')
+            return MockGateway.__encode_frame('PROPERTY SUBSCRIBED' if command == 'SUBSCRIBE PROPERTY' else 'PROPERTY UNSUBSCRIBED',
+                                              {'status': status, 'id': headers.get('id', '')})
+
+        elif command in ('SUBSCRIBE PROPERTIES', 'UNSUBSCRIBE PROPERTIES'):
+            results = [{'status': self.__subscribe(websocket, property_id, command == 'SUBSCRIBE PROPERTIES'), 'id': property_id}
+                       for property_id in json.loads(body)]
+            return MockGateway.__encode_frame('PROPERTIES SUBSCRIBED' if command == 'SUBSCRIBE PROPERTIES' else 'PROPERTIES UNSUBSCRIBED',
+                                              {'status': 'Success'}, json.dumps(results))
+
+        elif command == 'READ DATALOG':
+            return self.__read_datalog(headers, now)
+
+        elif command == 'READ MESSAGES':
+            messages = self.__messages(MockGateway.__timestamp(headers.get('from')), MockGateway.__timestamp(headers.get('to')), now,
+                                       int(headers['limit']) if 'limit' in headers else None)
+            return MockGateway.__encode_frame('MESSAGES READ', {'status': 'Success', 'count': len(messages)}, json.dumps(messages))
+
+        else:
+            return MockGateway.__encode_frame('ERROR', {'reason': f'unsupported command "{command}"'})
+
+    def __subscribe(self, websocket, property_id, subscribe):
+        status, property_ = self.installation.property(property_id)
+        if property_ is not None:
+            if subscribe:
+                self.__subscriptions[websocket][property_id] = None
+            else:
+                self.__subscriptions[websocket].pop(property_id, None)
+        return status
+
+    def __read_datalog(self, headers, now):
+        # Logged values are available at multiples of the datalog interval within the configured number of days.
+        first = now - self.datalog_days * 86400
+        from_ = max(MockGateway.__timestamp(headers.get('from')) or first, first)
+        to = min(MockGateway.__timestamp(headers.get('to')) or now, now)
+        start = math.ceil(from_ / self.datalog_interval) * self.datalog_interval
+
+        if 'id' not in headers:
+            property_ids = self.installation.logged_property_ids() if from_ <= to else []
+            return MockGateway.__encode_frame('DATALOG READ', {'status': 'Success', 'count': len(property_ids)}, '\n'.join(property_ids))
+
+        status, property_ = self.installation.property(headers['id'])
+        if property_ is None or not property_.logged:
+            return MockGateway.__encode_frame('DATALOG READ', {'status': status if property_ is None else 'NoProperty', 'id': headers['id'], 'count': 0})
+
+        timestamps = range(int(start), int(to) + 1, self.datalog_interval)
+        if 'limit' in headers:
+            timestamps = timestamps[:int(headers['limit'])]
+        csv = ''.join(f'{datetime.datetime.fromtimestamp(t).isoformat()},{property_.read(t)}\n' for t in timestamps)
+        return MockGateway.__encode_frame('DATALOG READ', {'status': 'Success', 'id': headers['id'], 'count': len(timestamps)}, csv)
+
+    def __messages(self, from_, to, now, limit=None):
+        # A message is generated at every multiple of the message interval, the newest messages are returned if a limit is given.
+        first = now - self.datalog_days * 86400
+        start = math.ceil(max(from_ or first, first) / self.message_interval)
+        end = math.floor(min(to or now, now) / self.message_interval)
+        if limit is not None:
+            start = max(start, end - limit + 1)
+        return [self.__message(k) for k in range(start, end + 1)]
+
+    def __message(self, k):
+        message_id, message = MockGateway.MESSAGES[k % len(MockGateway.MESSAGES)]
+        device_ids = [device_id for device_id, device in self.installation.devices.items() if device['model'] != 'Multicast']
+        return {
+            'timestamp': datetime.datetime.fromtimestamp(k * self.message_interval, datetime.timezone.utc).isoformat().replace('+00:00', 'Z'),
+            'access_id': self.installation.id,
+            'device_id': device_ids[k % len(device_ids)],
+            'message_id': message_id,
+            'message': message
+        }
+
+    async def __update_loop(self):
+        # Send an update for every subscribed property whose value changed and broadcast new device messages.
+        last_message = math.floor(time.time() / self.message_interval)
+        while True:
+            await asyncio.sleep(self.update_interval)
+            now = time.time()
+
+            for websocket, subscriptions in list(self.__subscriptions.items()):
+                for property_id, last_value in list(subscriptions.items()):
+                    _, value = self.installation.read(property_id, now)
+                    if value is not None and value != last_value:
+                        subscriptions[property_id] = value
+                        await MockGateway.__send(websocket, MockGateway.__encode_frame('PROPERTY UPDATE', {
+                            'id': property_id, 'value': MockGateway.__format_value(value)}))
+
+            message = math.floor(now / self.message_interval)
+            for k in range(last_message + 1, message + 1):
+                for websocket in list(self.__subscriptions):
+                    await MockGateway.__send(websocket, MockGateway.__encode_frame('DEVICE MESSAGE', self.__message(k)))
+            last_message = message
+
+    @staticmethod
+    async def __send(websocket, frame):
+        try:
+            await websocket.send(frame)
+        except websockets.ConnectionClosed:
+            pass
+
+    @staticmethod
+    def __encode_frame(command, headers, body=''):
+        return command + '\n' + ''.join(f'{key}:{value}\n' for key, value in headers.items()) + '\n' + body
+
+    @staticmethod
+    def __decode_frame(frame):
+        header, _, body = frame.partition('\n\n')
+        lines = header.split('\n')
+        headers = dict(line.split(':', 1) for line in lines[1:] if ':' in line)
+        return lines[0], headers, body
+
+    @staticmethod
+    def __format_value(value):
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        return str(value)
+
+    @staticmethod
+    def __timestamp(string):
+        # The clients send local time without time zone, messages and datalog are generated from unix timestamps.
+        if string is None:
+            return None
+        timestamp = datetime.datetime.fromisoformat(string.replace('Z', '+00:00'))
+        return timestamp.timestamp()
+
+
+if __name__ == '__main__':
+    # Parse arguments passed.
+    parser = argparse.ArgumentParser(description='Local OpenStuder gateway simulation for development, tests and benchmarks')
+    parser.add_argument('--host', default='localhost', help='address to listen on.')
+    parser.add_argument('--port', type=int, default=1987, help='port to listen on.')
+    parser.add_argument('--driver', choices=['Xcom485i', 'Demo'], default='Xcom485i', help='device access driver to simulate.')
+    parser.add_argument('--xtenders', type=int, default=1, help='number of Xtender inverters (Xcom485i only).')
+    parser.add_argument('--variotracks', type=int, default=1, help='number of VarioTrack solar chargers (Xcom485i only).')
+    parser.add_argument('--variostrings', type=int, default=0, help='number of VarioString solar chargers (Xcom485i only).')
+    parser.add_argument('--extra-properties', type=int, default=0, help='number of additional logged properties per device.')
+    parser.add_argument('--update-interval', type=float, default=1.0, help='interval in seconds subscribed properties are updated at.')
+    parser.add_argument('--datalog-days', type=float, default=7, help='number of days of logged data and messages available.')
+    parser.add_argument('--datalog-interval', type=int, default=60, help='interval in seconds between logged values.')
+    parser.add_argument('--message-interval', type=int, default=600, help='interval in seconds between device messages.')
+    parser.add_argument('--latency', type=float, default=0.0, help='delay in milliseconds added before every response.')
+    parser.add_argument('--access-level', choices=['Basic', 'Installer', 'Expert', 'QSP'], default='Installer', help='access level of authorized users.')
+    args = parser.parse_args()
+
+    gateway = MockGateway(SimulatedInstallation(args.driver, args.xtenders, args.variotracks, args.variostrings, args.extra_properties),
+                          args.update_interval, args.datalog_days, args.datalog_interval, args.message_interval, args.latency / 1000,
+                          args.access_level)
+    print(f'simulating {args.driver} installation with {len(gateway.installation.devices)} devices on ws://{args.host}:{args.port}, press Ctrl-C to quit.')
+    try:
+        asyncio.run(gateway.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        # Print request statistics, useful to compare the load caused by different clients.
+        for command, (count, duration, bytes_) in sorted(gateway.statistics.items()):
+            print(f'{command}: {count} requests, {duration / count * 1000:.2f} ms average, {bytes_} bytes sent')
@@ -1,16 +1,14 @@
 import tkinter as tk
 
-from PIL import Image, ImageTk
 from openstuder import SIStatus
 
 from installation import PropertyCategory
-from uielements import DashboardPage, Button
+from uielements import DashboardPage, Button, ResourceCache
 
 
 class BatteryDashboardPage(DashboardPage):
     def _setup_ui(self):
-        dashboard_image = Image.open('img/Battery.png')
-        self.__background_render = ImageTk.PhotoImage(dashboard_image)
+        self.__background_render = ResourceCache.image('img/Battery.png')
         self.__background = tk.Label(self, image=self.__background_render)
         self.__background.place(x=0, y=0, relwidth=1, relheight=1)
 
@@ -72,22 +70,22 @@ class BatteryDashboardPage(DashboardPage):
 
     def on_property_updated(self, property_id, value):
         self.__installation.set_property_value(property_id, value)
-        self.__update_values()
+        self._schedule_update()
 
     def on_properties_read(self, results):
         for result in results:
             if result.status == SIStatus.SUCCESS:
                 self.__installation.set_property_value(result.id, result.value)
-        self.__update_values()
+        self._schedule_update()
 
-    def __update_values(self):
-        self.__power.set(DashboardPage.format_float_value(self.__installation.battery_get_power(), max_decimals=2))
-        self.__voltage.set(DashboardPage.format_float_value(self.__installation.battery_get_voltage(), max_decimals=2))
-        self.__current.set(DashboardPage.format_float_value(self.__installation.battery_get_current(), max_decimals=2))
-        self.__temperature.set(DashboardPage.format_float_value(self.__installation.battery_get_temperature(), max_decimals=1))
+    def _update_values(self):
+        self._set_text(self.__power, DashboardPage.format_float_value(self.__installation.battery_get_power(), max_decimals=2))
+        self._set_text(self.__voltage, DashboardPage.format_float_value(self.__installation.battery_get_voltage(), max_decimals=2))
+        self._set_text(self.__current, DashboardPage.format_float_value(self.__installation.battery_get_current(), max_decimals=2))
+        self._set_text(self.__temperature, DashboardPage.format_float_value(self.__installation.battery_get_temperature(), max_decimals=1))
 
         battery_charge = self.__installation.battery_get_charge()
-        self.__charge.set(DashboardPage.format_float_value(battery_charge, max_decimals=0))
+        self._set_text(self.__charge, DashboardPage.format_float_value(battery_charge, max_decimals=0))
         self.__update_battery_indicator(battery_charge)
 
     def __update_battery_indicator(self, level):
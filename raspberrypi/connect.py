@@ -1,17 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox as tkmb
 
-from PIL import Image, ImageTk
 from openstuder import SIConnectionState, SIAccessLevel, SIStatus, SIDescriptionFlags
 
+from descriptioncache import DescriptionCache
 from installation import Xcom485IInstallation, DemoInstallation
-from uielements import DashboardPage, Button, Switch
+from messagestore import MessageStore
+from uielements import DashboardPage, Button, Switch, ResourceCache
 
 
 class ConnectDashboardPage(DashboardPage):
+    DESCRIPTION_FLAGS = SIDescriptionFlags.INCLUDE_ACCESS_INFORMATION | SIDescriptionFlags.INCLUDE_DEVICE_INFORMATION
+
     def _setup_ui(self):
-        dashboard_image = Image.open('img/Connecting.png')
-        self.__background_render = ImageTk.PhotoImage(dashboard_image)
+        self.__background_render = ResourceCache.image('img/Connecting.png')
         self.__background = tk.Label(self, image=self.__background_render)
         self.__background.place(x=0, y=0, relwidth=1, relheight=1)
 
@@ -22,14 +24,22 @@ class ConnectDashboardPage(DashboardPage):
         pass
 
     def on_connected(self, access_level, gateway_version):
-        self.client.enumerate()
+        # Reuse the description of the gateway if it was cached after the last enumeration, otherwise enumerate and describe.
+        self.__description_cache = DescriptionCache('localhost:1987')
+        self.master.master.message_store = MessageStore('localhost:1987')
+        description = self.__description_cache.get(flags=ConnectDashboardPage.DESCRIPTION_FLAGS)
+        if description is not None:
+            self.__initialize(description)
+        else:
+            self.client.enumerate()
 
     def on_disconnected(self):
         pass
 
     def on_enumerated(self, status, device_count):
         if status == SIStatus.SUCCESS:
-            self.client.describe(flags=SIDescriptionFlags.INCLUDE_ACCESS_INFORMATION | SIDescriptionFlags.INCLUDE_DEVICE_INFORMATION)
+            self.__description_cache.invalidate()
+            self.client.describe(flags=ConnectDashboardPage.DESCRIPTION_FLAGS)
         else:
             self.client.disconnect()
             tkmb.showerror('Enumeration error', f'Error during device enumeration: {status}')
@@ -40,6 +50,10 @@ class ConnectDashboardPage(DashboardPage):
             tkmb.showerror('Describe error', f'Error requesting system description: {status}')
             return
 
+        if self.__initialize(description):
+            self.__description_cache.put(description, flags=ConnectDashboardPage.DESCRIPTION_FLAGS)
+
+    def __initialize(self, description):
         if 'instances' not in description:
             self.client.disconnect()
             tkmb.showerror('Initialize error', 'Error requesting system description: data missing')
@@ -81,3 +95,4 @@ class ConnectDashboardPage(DashboardPage):
             tkmb.showerror('Initialize error', f'Error initializing dashboards: Driver "{driver}" not supported')
             return
         self._change_to_frame('overview')
+        return True
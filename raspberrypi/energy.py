@@ -1,16 +1,14 @@
 import tkinter as tk
 
-from PIL import Image, ImageTk
 from openstuder import SIStatus
 
 from installation import Installation, PropertyCategory
-from uielements import DashboardPage, Button
+from uielements import DashboardPage, Button, ResourceCache
 
 
 class EnergyDashboardPage(DashboardPage):
     def _setup_ui(self):
-        dashboard_image = Image.open('img/Energy.png')
-        self.__background_render = ImageTk.PhotoImage(dashboard_image)
+        self.__background_render = ResourceCache.image('img/Energy.png')
         self.__background = tk.Label(self, image=self.__background_render)
         self.__background.place(x=0, y=0, relwidth=1, relheight=1)
 
@@ -0,0 +1,107 @@
+import logging
+import logging.handlers
+import os
+import tkinter as tk
+import tracemalloc
+
+from uielements import ResourceCache
+
+
+class MemoryWatchdog:
+    # Compares periodic tracemalloc snapshots and logs the allocation sites that grew the most since the start, together with the number of Tk widgets,
+    # canvas items, fonts and images, so slow leaks show up in the log long before the device runs out of memory. Tracing costs memory and CPU, so the
+    # watchdog only runs if OPENSTUDER_MEMORY_WATCHDOG is set to the check interval in seconds.
+    def __init__(self, root, interval=600, path=os.path.join(os.path.expanduser('~'), '.openstuder', 'memory.log'), top=10, frames=4):
+        self.__root = root
+        self.__interval = int(interval * 1000)
+        self.__top = top
+
+        # The log is rotated as the kiosk runs for months.
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=1024 * 1024, backupCount=3)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        self.__log = logging.getLogger('openstuder.memory')
+        self.__log.setLevel(logging.INFO)
+        self.__log.addHandler(handler)
+        self.__log.propagate = False
+
+        # Only allocations made after the watchdog was started are traced, growth is what matters.
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.__baseline = self.__snapshot()
+        self.__previous = self.__baseline
+        self.__previous_canvas_items = self.__canvas_items()
+        self.__log.info(f'memory watchdog started, checking every {interval:g}s')
+        self.__root.after(self.__interval, self.__check)
+
+    @staticmethod
+    def from_environment(root):
+        interval = os.environ.get('OPENSTUDER_MEMORY_WATCHDOG')
+        if not interval:
+            return None
+
+        # A typo in the environment must not keep the kiosk from starting, the watchdog just stays disabled.
+        try:
+            interval = float(interval)
+        except ValueError:
+            interval = 0
+        if not 0 < interval < float('inf'):
+            print(f'memory watchdog disabled: OPENSTUDER_MEMORY_WATCHDOG must be the check interval in seconds, got "{os.environ["OPENSTUDER_MEMORY_WATCHDOG"]}".')
+            return None
+        return MemoryWatchdog(root, interval, path=os.environ.get('OPENSTUDER_MEMORY_LOG', os.path.join(os.path.expanduser('~'), '.openstuder', 'memory.log')))
+
+    def __check(self):
+        try:
+            self.__report()
+        except Exception as exception:
+            self.__log.exception(f'memory check failed: {exception}')
+        self.__root.after(self.__interval, self.__check)
+
+    def __report(self):
+        snapshot = self.__snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        self.__log.info(f'traced memory: {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB, tracemalloc overhead {tracemalloc.get_tracemalloc_memory() / 1024:.0f} KiB')
+
+        # Sites are ranked by their growth since the start, the growth since the last check shows whether they are still growing.
+        recent = {statistic.traceback: statistic for statistic in snapshot.compare_to(self.__previous, 'traceback')}
+        growing = [statistic for statistic in snapshot.compare_to(self.__baseline, 'traceback') if statistic.size_diff > 0][:self.__top]
+        for statistic in growing:
+            last = recent.get(statistic.traceback)
+            self.__log.info(f'  {statistic.size_diff / 1024:+.1f} KiB ({statistic.count_diff:+d} blocks) since start, '
+                            f'{(last.size_diff if last is not None else 0) / 1024:+.1f} KiB since last check: ' +
+                            ' <- '.join(f'{frame.filename}:{frame.lineno}' for frame in reversed(statistic.traceback)))
+        self.__previous = snapshot
+
+        # Tk objects are not allocated by Python, leaking widgets or canvas items only shows in their counts.
+        canvas_items = self.__canvas_items()
+        font_count, image_count = ResourceCache.statistics()
+        self.__log.info(f'tk: {self.__widget_count()} widgets, {sum(canvas_items.values())} canvas items, {font_count} fonts, {image_count} images')
+        for canvas, count in sorted(canvas_items.items()):
+            change = count - self.__previous_canvas_items.get(canvas, 0)
+            if change != 0:
+                self.__log.info(f'  {canvas}: {count} items ({change:+d})')
+        self.__previous_canvas_items = canvas_items
+
+    @staticmethod
+    def __snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            # Allocations made by the watchdog itself are not of interest.
+            tracemalloc.Filter(False, tracemalloc.__file__, all_frames=True),
+            tracemalloc.Filter(False, __file__, all_frames=True),
+            tracemalloc.Filter(False, os.path.join(os.path.dirname(logging.__file__), '*'), all_frames=True),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>')
+        ))
+
+    def __widgets(self):
+        widgets = [self.__root]
+        while len(widgets) > 0:
+            widget = widgets.pop()
+            widgets.extend(widget.winfo_children())
+            yield widget
+
+    def __widget_count(self):
+        return sum(1 for _ in self.__widgets())
+
+    def __canvas_items(self):
+        return {str(widget): len(widget.find_all()) for widget in self.__widgets() if isinstance(widget, tk.Canvas)}